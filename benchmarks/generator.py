@@ -0,0 +1,125 @@
+""" Parametric generators of C programs in the subset supported by the interpreter. Every generator takes the size
+of the workload and returns the source of a program whose entry point is `main`.
+"""
+
+
+def generate_if_ladder(size):
+    """ Ladder of conditional statements nested into false branches, i.e. `else if` chain over distinct parameters
+    """
+    parameters = ", ".join("int a{0}".format(index) for index in range(size))
+    lines = ["int main({0}) {{".format(parameters or "void"), "    int r = 0;"]
+
+    for index in range(size):
+        indent = "    " * (index + 1)
+        lines.append("{0}if (a{1} > {1}) {{".format(indent, index))
+        lines.append("{0}    r = r + {1};".format(indent, 2 ** index))
+        lines.append("{0}}} else {{".format(indent))
+        lines.append("{0}    r = r - {1};".format(indent, index + 1))
+
+    for index in reversed(range(size)):
+        lines.append("{0}}}".format("    " * (index + 1)))
+
+    lines.append("    return r;")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_path_explosion(size):
+    """ Sequence of conditional statements over independent parameters, so the number of paths, as well as the
+    number of distinct returned values, doubles with every statement
+    """
+    parameters = ", ".join("int a{0}".format(index) for index in range(size))
+    lines = ["int main({0}) {{".format(parameters or "void"), "    int r = 0;"]
+
+    for index in range(size):
+        lines.append("    if (a{0} > 0) {{".format(index))
+        lines.append("        r = r + {0};".format(2 ** index))
+        lines.append("    }")
+
+    lines.append("    return r;")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_fan_out(size):
+    """ Entry point calling many distinct functions with branches
+    """
+    lines = []
+
+    for index in range(size):
+        lines.append("int f{0}(int x) {{".format(index))
+        lines.append("    if (x > {0}) {{".format(index))
+        lines.append("        return x - {0};".format(index))
+        lines.append("    }")
+        lines.append("    return x + {0};".format(index))
+        lines.append("}")
+        lines.append("")
+
+    calls = " + ".join("f{0}(x)".format(index) for index in range(size)) or "0"
+    lines.append("int main(int x) {")
+    lines.append("    return {0};".format(calls))
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_call_chain(size):
+    """ Chain of functions, each of which calls the next one
+    """
+    lines = ["int f{0}(int x) {{".format(size), "    return x;", "}", ""]
+
+    for index in reversed(range(size)):
+        lines.append("int f{0}(int x) {{".format(index))
+        lines.append("    if (x > {0}) {{".format(index))
+        lines.append("        return f{0}(x - 1);".format(index + 1))
+        lines.append("    }")
+        lines.append("    return f{0}(x + 1);".format(index + 1))
+        lines.append("}")
+        lines.append("")
+
+    lines.append("int main(int x) {")
+    lines.append("    return f0(x);")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_assignment_chain(size):
+    """ Long straight-line code updating a few variables
+    """
+    lines = ["int main(int x, int y) {", "    int a = x;", "    int b = y;"]
+
+    for index in range(size):
+        if index % 3 == 0:
+            lines.append("    a = a + b;")
+        elif index % 3 == 1:
+            lines.append("    b = a - {0};".format(index))
+        else:
+            lines.append("    a = a * 2;")
+
+    lines.append("    return a + b;")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_many_options(size):
+    """ Variable updated under many distinct conditions, so it accumulates an option per update
+    """
+    lines = ["int main(int x) {", "    int v = 0 - 1;"]
+
+    for index in range(size):
+        lines.append("    if (x == {0}) {{".format(index))
+        lines.append("        v = {0};".format(index * 10))
+        lines.append("    }")
+
+    lines.append("    return v + 1;")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+generators = {
+    "if_ladder": generate_if_ladder,
+    "path_explosion": generate_path_explosion,
+    "fan_out": generate_fan_out,
+    "call_chain": generate_call_chain,
+    "assignment_chain": generate_assignment_chain,
+    "many_options": generate_many_options,
+}
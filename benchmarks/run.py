@@ -0,0 +1,141 @@
+""" Runs generated workloads across sizes and reports scaling of time, solver calls, memory and option counts.
+Results are written as JSON and can be compared with results of another version to catch regressions:
+
+    python -m benchmarks.run --output new.json --baseline old.json
+"""
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import click
+
+from benchmarks.generator import generators
+from mantaray import core
+from mantaray.profiling import profiler
+from mantaray.symbolic_execution.expressions import Conditional
+
+# Sizes are chosen per workload, since some of them grow exponentially
+DEFAULT_SIZES = {
+    "if_ladder": (2, 4, 8, 16, 32),
+    "path_explosion": (2, 4, 6, 8, 10),
+    "fan_out": (2, 4, 8, 16, 32),
+    "call_chain": (2, 4, 6, 8, 10),
+    "assignment_chain": (8, 32, 128, 256, 512),
+    "many_options": (2, 4, 8, 16, 32),
+}
+
+SOLVER_HOOKS = ("solver.check", "solver.check_all", "solver.se_simplify", "solver.se_simplify_all",
+                "solver.session_check")
+
+
+def measure(task):
+    """ Analyzes the generated program with profiler installed. It is run in a fresh process, so peak RSS belongs to
+    the single measurement.
+    """
+    workload, size, deepness = task
+    file_descriptor, path = tempfile.mkstemp(prefix="{0}_{1}_".format(workload, size), suffix=".c")
+
+    try:
+        with os.fdopen(file_descriptor, "w") as file:
+            file.write(generators[workload](size))
+
+        profiler.install()
+        started = time.perf_counter()
+        results = core.run(path, deepness)
+        wall_time = time.perf_counter() - started
+        profiler.uninstall()
+    finally:
+        os.remove(path)
+
+    report = profiler.report()
+    hooks = report["hooks"]
+
+    return {
+        "workload": workload,
+        "size": size,
+        "wall_time": wall_time,
+        "parsing_time": hooks["parsing"]["total"],
+        "solver_calls": sum(hooks[name]["count"] for name in SOLVER_HOOKS),
+        "solver_time": sum(hooks[name]["total"] for name in SOLVER_HOOKS),
+        "peak_rss": report["peak_rss"],
+        "peak_options_count": report["peak_options_count"],
+        "peak_context_depth": report["peak_context_depth"],
+        "returned_options_count": sum(len(result.value.options) if isinstance(result.value, Conditional) else 1
+                                      for result in results or ()),
+    }
+
+
+def run(workloads, sizes, deepness, repeat):
+    """ Yields the fastest of repeated measurements of every workload of every size
+    """
+    for workload in workloads:
+        for size in sizes or DEFAULT_SIZES[workload]:
+            measurements = []
+
+            for _ in range(repeat):
+                with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+                    measurements.append(pool.apply(measure, ((workload, size, deepness),)))
+
+            # The fastest repetition is the least disturbed by the rest of the system
+            yield min(measurements, key=lambda measurement: measurement["wall_time"])
+
+
+def compare(records, baseline_records, tolerance):
+    """ Returns records, which are slower than their baseline records by more than the tolerance, along with ratios
+    """
+    baseline = {(record["workload"], record["size"]): record for record in baseline_records}
+    regressions = []
+
+    for record in records:
+        baseline_record = baseline.get((record["workload"], record["size"]), None)
+
+        if baseline_record is None or not baseline_record["wall_time"]:
+            continue
+
+        ratio = record["wall_time"] / baseline_record["wall_time"]
+
+        if ratio > 1 + tolerance:
+            regressions.append((record, ratio))
+
+    return regressions
+
+
+@click.command()
+@click.option("--workload", "-w", "workloads", multiple=True, type=click.Choice(sorted(generators)),
+              help="workload to run, all workloads by default")
+@click.option("--size", "-s", "sizes", multiple=True, type=click.IntRange(min=1),
+              help="size of workloads, default sizes of every workload by default")
+@click.option("--deepness", default=1, help="number of iterations for undecidable loops")
+@click.option("--repeat", default=3, type=click.IntRange(min=1), help="number of measurements to take the fastest of")
+@click.option("--output", "-o", type=click.File("w"), help="file to write results to as JSON")
+@click.option("--baseline", type=click.File("r"), help="results of another version to compare wall time with")
+@click.option("--tolerance", default=0.2, help="relative slowdown reported as regression")
+def main(workloads, sizes, deepness, repeat, output, baseline, tolerance):
+    records = []
+    click.echo("{0:<18} {1:>6} {2:>10} {3:>8} {4:>10} {5:>10} {6:>8}".format(
+        "workload", "size", "wall, s", "solver", "solver, s", "rss, MiB", "options"))
+
+    for record in run(workloads or sorted(generators), sizes, deepness, repeat):
+        records.append(record)
+        click.echo("{workload:<18} {size:>6} {wall_time:>10.3f} {solver_calls:>8} {solver_time:>10.3f} "
+                   "{0:>10.1f} {peak_options_count:>8}".format(record["peak_rss"] / 2 ** 20, **record))
+
+    if output is not None:
+        json.dump(records, output, indent=4)
+
+    if baseline is not None:
+        regressions = compare(records, json.load(baseline), tolerance)
+
+        for record, ratio in regressions:
+            click.echo("Regression: `{0}` of size {1} is {2:.2f} times slower".format(
+                record["workload"], record["size"], ratio))
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,2 @@
-from .cli import main
\ No newline at end of file
+from .cli import main
+from .core import analyze, FunctionResult
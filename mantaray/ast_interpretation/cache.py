@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import tempfile
+
+import pycparser
+from pycparser import c_parser, preprocess_file
+
+logger = logging.getLogger("ast_cache")
+
+AST_CACHE_FORMAT_VERSION = 1
+PICKLE_PROTOCOL = min(5, pickle.HIGHEST_PROTOCOL)
+
+_line_marker = re.compile(r'^#\s*(?:line\s+)?\d+\s+"((?:[^"\\]|\\.)*)"', re.MULTILINE)
+
+
+class ASTCache:
+    """ Local cache of parsed ASTs. ASTs are stored by hash of preprocessed source, C preprocessor path and flags.
+    Besides, every source is mapped to files it includes, so sources whose dependencies are unchanged are loaded
+    from cache without running the preprocessor.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._parser = None
+        os.makedirs(directory, exist_ok=True)
+
+    def get_ast(self, file_name, cpp_path=None, cpp_args=()):
+        cpp_args = list(cpp_args)
+        manifest_path = self._get_path("source", os.path.abspath(file_name), cpp_path, cpp_args)
+        manifest = self._load(manifest_path, json.load, "r")
+
+        if manifest is not None and self._are_unchanged(manifest["dependencies"]):
+            ast = self._load(self._get_ast_path(manifest["content_hash"]), pickle.load, "rb")
+
+            if ast is not None:
+                self.hits += 1
+                logger.info("AST of {0} loaded from cache.".format(file_name))
+                return ast
+
+        if cpp_path is not None:
+            text = preprocess_file(file_name, cpp_path, cpp_args)
+            dependencies = set(match.group(1) for match in _line_marker.finditer(text))
+            dependencies = [dependency for dependency in dependencies if os.path.isfile(dependency)]
+        else:
+            with open(file_name, encoding="utf-8") as file:
+                text = file.read()
+            dependencies = [file_name]
+
+        content_hash = self._get_hash("content", cpp_path, cpp_args, text)
+        ast_path = self._get_ast_path(content_hash)
+        ast = self._load(ast_path, pickle.load, "rb")
+
+        if ast is not None:
+            self.hits += 1
+            logger.info("AST of {0} loaded from cache, preprocessed source is unchanged.".format(file_name))
+        else:
+            self.misses += 1
+            ast = self._get_parser().parse(text, file_name)
+            self._store(ast_path, lambda file: pickle.dump(ast, file, protocol=PICKLE_PROTOCOL), "wb")
+
+        manifest = {
+            "content_hash": content_hash,
+            "dependencies": [[dependency] + self._get_stamp(dependency) for dependency in sorted(dependencies)],
+        }
+        self._store(manifest_path, lambda file: json.dump(manifest, file), "w")
+        return ast
+
+    def _get_parser(self):
+        if self._parser is None:
+            self._parser = c_parser.CParser()
+
+        return self._parser
+
+    def _are_unchanged(self, dependencies):
+        for dependency in dependencies:
+            try:
+                if self._get_stamp(dependency[0]) != dependency[1:]:
+                    return False
+            except OSError:
+                return False
+
+        return True
+
+    @staticmethod
+    def _get_stamp(file_name):
+        stat = os.stat(file_name)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    @staticmethod
+    def _get_hash(*components):
+        text = json.dumps([AST_CACHE_FORMAT_VERSION, pycparser.__version__] + list(components))
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _get_path(self, *components):
+        return os.path.join(self.directory, self._get_hash(*components) + ".json")
+
+    def _get_ast_path(self, content_hash):
+        return os.path.join(self.directory, content_hash + ".ast")
+
+    @staticmethod
+    def _load(path, load, mode):
+        try:
+            with open(path, mode) as file:
+                return load(file)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _store(self, path, dump, mode):
+        # Written atomically, since the cache may be shared by concurrent workers
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory)
+
+        try:
+            with os.fdopen(descriptor, mode) as file:
+                dump(file)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
@@ -2,6 +2,7 @@ import logging
 
 from pycparser import c_ast
 
+from mantaray.ast_interpretation.call_graph import CallGraph
 from mantaray.symbolic_execution.type import SEType
 
 logger = logging.getLogger("call_analyzer")
@@ -13,7 +14,10 @@ class FunctionDescriptor:
         self.return_se_type = return_se_type
         self.parameters = parameters
         self.body = body
+        self.code = None
         self.callees = set()
+        self.summarizable = False
+        self.summary = None
 
     def __str__(self):
         parameters_str = ", ".join(map(lambda se_type: se_type.value, self.parameters.values()))
@@ -48,6 +52,13 @@ class CallAnalyzer(c_ast.NodeVisitor):
 
     @staticmethod
     def run(ast):
+        """ Returns call graph of functions defined in the AST, which table is kept by the graph
+        """
         call_analyzer = CallAnalyzer()
         call_analyzer.visit(ast)
-        return call_analyzer.functions
+        call_graph = CallGraph(call_analyzer.functions)
+
+        for name, function_descriptor in call_analyzer.functions.items():
+            function_descriptor.summarizable = call_graph.is_summarizable(name)
+
+        return call_graph
@@ -0,0 +1,118 @@
+class CallGraph:
+    """ Call graph of functions condensed into strongly connected components. Components are kept in reverse
+    topological order, i.e. every component follows all components it calls. Calls of functions which are not
+    defined in the table are ignored.
+    """
+    def __init__(self, functions):
+        self.functions = functions
+        self.components = []
+        self._components_indices = {}
+        self._condense()
+
+        self._callers_components = [set() for _ in self.components]
+        self._callees_components = [set() for _ in self.components]
+
+        for index, component in enumerate(self.components):
+            for name in component:
+                for callee in self._get_callees(name):
+                    callee_index = self._components_indices[callee]
+                    if callee_index != index:
+                        self._callees_components[index].add(callee_index)
+                        self._callers_components[callee_index].add(index)
+
+        # Function can be summarized if neither it nor any function it calls is recursive, so interpreting it with
+        # unknown arguments terminates
+        self._summarizable_components = set()
+
+        for index, component in enumerate(self.components):
+            if not self._is_recursive(component) and self._callees_components[index] <= self._summarizable_components:
+                self._summarizable_components.add(index)
+
+    def get_entry_points(self):
+        """ Returns names of functions, which are not called by functions of other components, sorted by names
+        """
+        return sorted(name for index, component in enumerate(self.components)
+                      if not self._callers_components[index] for name in component)
+
+    def is_summarizable(self, name):
+        return self._components_indices[name] in self._summarizable_components
+
+    def get_summarization_levels(self):
+        """ Returns names of summarizable functions grouped into levels, so that functions of every level call only
+        functions of previous levels. Functions of the same level can be summarized independently.
+        """
+        levels = []
+        components_levels = {}
+
+        for index, component in enumerate(self.components):
+            if index not in self._summarizable_components:
+                continue
+
+            level = max((components_levels[callee_index] + 1 for callee_index in self._callees_components[index]),
+                        default=0)
+            components_levels[index] = level
+
+            if level == len(levels):
+                levels.append([])
+
+            levels[level].extend(component)
+
+        return [sorted(level) for level in levels]
+
+    def _get_callees(self, name):
+        return sorted(callee for callee in self.functions[name].callees if callee in self.functions)
+
+    def _is_recursive(self, component):
+        return len(component) > 1 or component[0] in self.functions[component[0]].callees
+
+    def _condense(self):
+        """ Finds strongly connected components by iterative Tarjan's algorithm, which emits them in reverse
+        topological order
+        """
+        indices = {}
+        low_links = {}
+        stack = []
+        on_stack = set()
+
+        for root in sorted(self.functions):
+            if root in indices:
+                continue
+
+            work = [(root, iter(self._get_callees(root)))]
+            indices[root] = low_links[root] = len(indices)
+            stack.append(root)
+            on_stack.add(root)
+
+            while work:
+                name, callees = work[-1]
+                callee = next(callees, None)
+
+                if callee is not None:
+                    if callee not in indices:
+                        indices[callee] = low_links[callee] = len(indices)
+                        stack.append(callee)
+                        on_stack.add(callee)
+                        work.append((callee, iter(self._get_callees(callee))))
+                    elif callee in on_stack:
+                        low_links[name] = min(low_links[name], indices[callee])
+                    continue
+
+                work.pop()
+
+                if work:
+                    caller = work[-1][0]
+                    low_links[caller] = min(low_links[caller], low_links[name])
+
+                if low_links[name] == indices[name]:
+                    component = []
+
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        self._components_indices[member] = len(self.components)
+                        component.append(member)
+
+                        if member == name:
+                            break
+
+                    self.components.append(sorted(component))
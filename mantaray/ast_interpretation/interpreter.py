@@ -1,54 +1,113 @@
-import logging
-
-from pycparser import c_ast
-
-from mantaray.symbolic_execution.expressions import BinaryOperatorType, UnaryOperatorType
+from mantaray.ast_interpretation.lowering import IRNode, lower
+from mantaray.ast_interpretation.summaries import FunctionSummary
+from mantaray.symbolic_execution.expressions import se_not
 from mantaray.symbolic_execution.optionalizer import optionalize
 from mantaray.symbolic_execution.type import SEType
+from mantaray.tracing import tracer, TraceLevel
 
-logger = logging.getLogger("ast_interpreter")
+# Iterations of loops, which can not exit, are not bounded by deepness. Loops running longer are truncated.
+DECIDED_ITERATIONS_LIMIT = 1000
 
 
-class ASTInterpreter(c_ast.NodeVisitor):
-    def __init__(self, se_engine, functions):
+class ASTInterpreter:
+    """ Interprets IR of function bodies (see `mantaray.ast_interpretation.lowering`) using symbolic execution
+    engine. Bodies are lowered from C AST once, on the first call. Called functions are interpreted once with unknown
+    arguments, and their summaries are instantiated at call sites. Calls of entry points and of functions which can
+    not be summarized are inlined.
+    """
+    def __init__(self, se_engine, functions, calls_depth=0):
         self.se_engine = se_engine
         self.functions = functions
-        self.interpret = self.visit
+        self._calls_depth = calls_depth
+
+    def interpret(self, node):
+        return self._handlers[node.__class__](self, node)
 
     def visit_Assignment(self, assignment):
         se_rvalue = self.interpret(assignment.rvalue)
         se_lvalue = self.interpret(assignment.lvalue)
-        return self.se_engine.process_assignment_expr(se_lvalue, se_rvalue)
 
-    def visit_FuncCall(self, function_call):
-        function_name = function_call.name.name
-        result = None
-        if function_name in self.functions:
-            descriptor = self.functions[function_name]
-            se_arguments = []
+        if assignment.bop_type is not None:
+            se_rvalue = self.se_engine.process_binary_operator(se_lvalue, se_rvalue, assignment.bop_type)
 
-            if function_call.args:
-                for expr in function_call.args.exprs:
-                    se_arguments.append(self.visit(expr))
+        return self.se_engine.process_assignment_expr(se_lvalue, se_rvalue)
 
-            if self.se_engine.try_enter_function(descriptor, se_arguments):
-                logger.info("Entering body of function: `{0}`".format(descriptor))
-                self.interpret(descriptor.body)
+    def visit_Call(self, function_call):
+        result = None
+        if function_call.name in self.functions:
+            descriptor = self.functions[function_call.name]
+            se_arguments = [self.interpret(argument) for argument in function_call.arguments]
+
+            summary = self._get_summary(descriptor) if self._calls_depth > 0 else None
+
+            if summary is not None and not summary.is_inlined:
+                result = summary.instantiate([self.se_engine.conditionalize(argument) for argument in se_arguments])
+                self.se_engine.truncated_loops_count += summary.truncated_loops_count
+
+                if tracer.is_enabled(TraceLevel.INFO):
+                    tracer.emit(TraceLevel.INFO, "ast_interpreter", "summary_instantiated",
+                                "Summary of `{function}` instantiated: `{value}`", function=descriptor, value=result)
+            elif self.se_engine.try_enter_function(descriptor, se_arguments):
+                if tracer.is_enabled(TraceLevel.INFO):
+                    tracer.emit(TraceLevel.INFO, "ast_interpreter", "function_entered",
+                                "Entering body of function: `{function}`", function=descriptor)
+
+                self._calls_depth += 1
+                self.interpret(self._get_code(descriptor))
+                self._calls_depth -= 1
                 result = self.se_engine.leave_function()
-                logger.info("Leaved body of function: `{0}`".format(descriptor))
 
-                options_str = ""
-                for option in optionalize(result):
-                    options_str += "    {0},\n".format(option)
-                logger.info("`{0}` returned: {{\n{1}}}".format(descriptor, options_str))
+                if tracer.is_enabled(TraceLevel.INFO):
+                    tracer.emit(TraceLevel.INFO, "ast_interpreter", "function_left",
+                                "Leaved body of function: `{function}`", function=descriptor)
+                    options = optionalize(result, self.se_engine.domain)
+                    options_str = "".join("    {0},\n".format(option) for option in options)
+                    tracer.emit(TraceLevel.INFO, "ast_interpreter", "function_returned",
+                                "`{function}` returned: {{\n{options}}}", function=descriptor, options=options_str)
 
         return result
 
+    def summarize(self, descriptor):
+        """ Interprets the function with unknown arguments in a spawned engine and returns its summary. Functions
+        which are not summarizable get summaries standing for inlining.
+        """
+        if not descriptor.summarizable:
+            return FunctionSummary()
+
+        se_engine = self.se_engine.spawn()
+        se_engine.try_enter_function(descriptor, [])
+        parameters = se_engine.get_parameters(descriptor)
+        ASTInterpreter(se_engine, self.functions, self._calls_depth + 1).interpret(self._get_code(descriptor))
+        summary = FunctionSummary(parameters, se_engine.leave_function(), se_engine.truncated_loops_count)
+
+        if tracer.is_enabled(TraceLevel.INFO):
+            tracer.emit(TraceLevel.INFO, "ast_interpreter", "function_summarized",
+                        "Summary of `{function}` computed: `{value}`", function=descriptor, value=summary.value)
+
+        return summary
+
+    def _get_summary(self, descriptor):
+        """ Returns summary of the function, computing it on the first call
+        """
+        if descriptor.summary is None:
+            descriptor.summary = self.summarize(descriptor)
+
+        return descriptor.summary
+
+    @staticmethod
+    def _get_code(descriptor):
+        """ Returns IR of the function body, lowering it on the first call
+        """
+        if descriptor.code is None:
+            descriptor.code = lower(descriptor.body)
+
+        return descriptor.code
+
     def visit_Constant(self, constant):
-        return self.se_engine.create_literal(constant.value, SEType.get_from_name(constant.type))
+        return self.se_engine.create_literal(constant.value, constant.se_type)
 
     def visit_Decl(self, decl):
-        se_type = SEType.get_from_ast(decl.type)
+        se_type = decl.se_type
         variable = self.se_engine.create_variable(decl.name, se_type)
 
         if decl.init is not None:
@@ -58,34 +117,107 @@ class ASTInterpreter(c_ast.NodeVisitor):
             se_rvalue = self.se_engine.create_literal(se_type.default_value, se_type)
 
         self.se_engine.process_assignment_expr(variable, se_rvalue)
-        logger.info("Variable `{0} {1}` initialized with value: `{2}`".format(se_type, variable, se_rvalue))
 
-        return variable
+        if tracer.is_enabled(TraceLevel.INFO):
+            tracer.emit(TraceLevel.INFO, "ast_interpreter", "variable_initialized",
+                        "Variable `{se_type} {variable}` initialized with value: `{value}`",
+                        se_type=se_type, variable=variable, value=se_rvalue)
 
-    def visit_ID(self, id):
-        if id.name in ("false", "true"):
-            return self.se_engine.create_literal(id.name, SEType.BOOL)
+        return variable
 
-        return self.se_engine.get_variable_ref(id.name)
+    def visit_Name(self, name):
+        return self.se_engine.get_variable_ref(name.name)
 
     def visit_Return(self, return_statement):
         return_expr = self.interpret(return_statement.expr)
         self.se_engine.process_return_statement(return_expr)
 
     def visit_BinaryOp(self, binary_op):
-        bop_type = BinaryOperatorType.get_from_sign(binary_op.op)
         argument2 = self.interpret(binary_op.right)
         argument1 = self.interpret(binary_op.left)
-        return self.se_engine.process_binary_operator(argument1, argument2, bop_type)
+        return self.se_engine.process_binary_operator(argument1, argument2, binary_op.bop_type)
 
     def visit_UnaryOp(self, unary_op):
-        op_type = UnaryOperatorType.get_from_sign(unary_op.op)
-        argument = self.interpret(unary_op.expr)
-        return self.se_engine.process_unary_operator(argument, op_type)
+        argument = self.interpret(unary_op.argument)
+        return self.se_engine.process_unary_operator(argument, unary_op.op_type)
+
+    def visit_Increment(self, increment):
+        variable = self.interpret(increment.target)
+        previous_value = self.se_engine.conditionalize(variable)
+        one = self.se_engine.create_literal(1, variable.get_se_type())
+        value = self.se_engine.process_assignment_expr(
+            variable, self.se_engine.process_binary_operator(variable, one, increment.bop_type))
+        return previous_value if increment.postfix else value
+
+    def visit_Sequence(self, sequence):
+        result = None
+
+        for item in sequence.items:
+            result = self.interpret(item)
 
-    def visit_Compound(self, compound_statement):
+        return result
+
+    def visit_Loop(self, loop):
+        if loop.body_first:
+            self.interpret(loop.body)
+
+        self._unroll_loop(loop.cond, loop.body, loop.step)
+
+    def _unroll_loop(self, condition_node, body, step_node=None):
+        """ Unrolls the loop into nested conditional statements. Iterations, after which the loop may exit, are
+        bounded by deepness. Unrolling stops early, when an iteration leaves values of variables unchanged, since
+        all the following iterations would repeat it. Paths running more iterations, which can not exit, than
+        `DECIDED_ITERATIONS_LIMIT` are cut off, such loops are reported and counted by the engine as truncated ones.
+        """
+        iterations_count = 0
+        undecided_iterations_count = 0
+        previous_values = None
+
+        while self.se_engine.current_context.is_reachable and \
+                undecided_iterations_count < self.se_engine.deepness:
+            if condition_node is not None:
+                condition = self.interpret(condition_node)
+            else:
+                condition = self.se_engine.create_literal(True, SEType.BOOL)
+
+            may_exit = self.se_engine.is_feasible(se_not(condition))
+
+            if iterations_count - undecided_iterations_count >= DECIDED_ITERATIONS_LIMIT:
+                if self.se_engine.is_feasible(condition):
+                    self.se_engine.truncated_loops_count += 1
+                    tracer.emit(TraceLevel.WARNING, "ast_interpreter", "loop_truncated",
+                                "Loop truncated after {iterations} iterations, values of further ones are lost",
+                                iterations=iterations_count)
+                break
+
+            if not self.se_engine.try_enter_loop_iteration(condition):
+                break
+
+            iterations_count += 1
+            undecided_iterations_count += may_exit
+
+            self.interpret(body)
+
+            if step_node is not None and self.se_engine.current_context.is_reachable:
+                self.interpret(step_node)
+
+            values = self.se_engine.get_path_values()
+
+            if values is not None and values == previous_values:
+                break
+
+            previous_values = values
+
+        if tracer.is_enabled(TraceLevel.INFO):
+            tracer.emit(TraceLevel.INFO, "ast_interpreter", "loop_unrolled", "Loop unrolled {iterations} times",
+                        iterations=iterations_count)
+
+        for _ in range(iterations_count):
+            self.se_engine.leave_loop_iteration()
+
+    def visit_Block(self, block):
         if self.se_engine.try_enter_statement_block():
-            for statement in compound_statement.block_items:
+            for statement in block.statements:
                 if self.se_engine.current_context.is_reachable:
                     self.interpret(statement)
             self.se_engine.leave_statement_block()
@@ -107,6 +239,12 @@ class ASTInterpreter(c_ast.NodeVisitor):
 
             self.se_engine.leave_conditional_statement()
 
+    def visit_Unsupported(self, unsupported):
+        if tracer.is_enabled(TraceLevel.WARNING):
+            tracer.emit(TraceLevel.WARNING, "ast_interpreter", "unsupported_node", "Unsupported node type: {node}",
+                        node=unsupported.node)
+
 
-    def generic_visit(self, node):
-        logger.warning("Unsupported node type: {0}".format(node))
+# Handlers are resolved once for every IR node class instead of by names on every visit
+ASTInterpreter._handlers = {node_class: getattr(ASTInterpreter, "visit_" + node_class.__name__)
+                            for node_class in IRNode.__subclasses__()}
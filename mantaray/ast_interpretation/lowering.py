@@ -0,0 +1,242 @@
+from pycparser import c_ast
+
+from mantaray.errors import MantarayNotImplemented
+from mantaray.symbolic_execution.expressions import BinaryOperatorType, UnaryOperatorType
+from mantaray.symbolic_execution.type import SEType
+
+
+class IRNode:
+    """ Base of nodes of the compact intermediate representation of function bodies. Types and operators of IR nodes
+    are resolved once by lowering, so interpretation dispatches on node classes only.
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        return "{0}({1})".format(type(self).__name__, ", ".join(str(getattr(self, slot)) for slot in self.__slots__))
+
+
+class Constant(IRNode):
+    __slots__ = ("value", "se_type")
+
+    def __init__(self, value, se_type):
+        self.value = value
+        self.se_type = se_type
+
+
+class Name(IRNode):
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class Decl(IRNode):
+    __slots__ = ("name", "se_type", "init")
+
+    def __init__(self, name, se_type, init):
+        self.name = name
+        self.se_type = se_type
+        self.init = init
+
+
+class Assignment(IRNode):
+    """ Assignment, compound one (e.g. `+=`) has the operator type
+    """
+    __slots__ = ("lvalue", "rvalue", "bop_type")
+
+    def __init__(self, lvalue, rvalue, bop_type=None):
+        self.lvalue = lvalue
+        self.rvalue = rvalue
+        self.bop_type = bop_type
+
+
+class Increment(IRNode):
+    """ Prefix or postfix increment or decrement, i.e. addition or subtraction of one
+    """
+    __slots__ = ("target", "bop_type", "postfix")
+
+    def __init__(self, target, bop_type, postfix):
+        self.target = target
+        self.bop_type = bop_type
+        self.postfix = postfix
+
+
+class BinaryOp(IRNode):
+    __slots__ = ("left", "right", "bop_type")
+
+    def __init__(self, left, right, bop_type):
+        self.left = left
+        self.right = right
+        self.bop_type = bop_type
+
+
+class UnaryOp(IRNode):
+    __slots__ = ("argument", "op_type")
+
+    def __init__(self, argument, op_type):
+        self.argument = argument
+        self.op_type = op_type
+
+
+class Call(IRNode):
+    __slots__ = ("name", "arguments")
+
+    def __init__(self, name, arguments):
+        self.name = name
+        self.arguments = arguments
+
+
+class Return(IRNode):
+    __slots__ = ("expr",)
+
+    def __init__(self, expr):
+        self.expr = expr
+
+
+class Sequence(IRNode):
+    """ Items evaluated one after another within the current scope, the value is the value of the last one
+    """
+    __slots__ = ("items",)
+
+    def __init__(self, items):
+        self.items = items
+
+
+class Block(IRNode):
+    """ Statements interpreted within a new scope while the path is reachable
+    """
+    __slots__ = ("statements",)
+
+    def __init__(self, statements):
+        self.statements = statements
+
+
+class If(IRNode):
+    __slots__ = ("cond", "iftrue", "iffalse")
+
+    def __init__(self, cond, iftrue, iffalse):
+        self.cond = cond
+        self.iftrue = iftrue
+        self.iffalse = iffalse
+
+
+class Loop(IRNode):
+    """ Loop with optional condition and statement evaluated after every iteration. Body of `do`/`while` loop is
+    interpreted once before checking the condition.
+    """
+    __slots__ = ("cond", "body", "step", "body_first")
+
+    def __init__(self, cond, body, step=None, body_first=False):
+        self.cond = cond
+        self.body = body
+        self.step = step
+        self.body_first = body_first
+
+
+class Unsupported(IRNode):
+    """ Node which has no IR counterpart, it is reported when interpreted
+    """
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+
+_increments = {
+    "++": (BinaryOperatorType.ADD, False),
+    "--": (BinaryOperatorType.MINUS, False),
+    "p++": (BinaryOperatorType.ADD, True),
+    "p--": (BinaryOperatorType.MINUS, True),
+}
+
+
+class Lowerer(c_ast.NodeVisitor):
+    """ Lowers C AST of function bodies to IR
+    """
+    def __init__(self):
+        self.lower = self.visit
+
+    def visit_Constant(self, constant):
+        return Constant(constant.value, SEType.get_from_name(constant.type))
+
+    def visit_ID(self, id):
+        if id.name in ("false", "true"):
+            return Constant(id.name, SEType.BOOL)
+
+        return Name(id.name)
+
+    def visit_Decl(self, decl):
+        return Decl(decl.name, SEType.get_from_ast(decl.type), self._lower_optional(decl.init))
+
+    def visit_Assignment(self, assignment):
+        # Compound assignment, e.g. `+=`, has the operator type
+        bop_type = BinaryOperatorType.get_from_sign(assignment.op[:-1]) if assignment.op != "=" else None
+        return Assignment(self.lower(assignment.lvalue), self.lower(assignment.rvalue), bop_type)
+
+    def visit_BinaryOp(self, binary_op):
+        return BinaryOp(self.lower(binary_op.left), self.lower(binary_op.right),
+                        BinaryOperatorType.get_from_sign(binary_op.op))
+
+    def visit_UnaryOp(self, unary_op):
+        increment = _increments.get(unary_op.op, None)
+
+        if increment is not None:
+            return Increment(self.lower(unary_op.expr), *increment)
+
+        return UnaryOp(self.lower(unary_op.expr), UnaryOperatorType.get_from_sign(unary_op.op))
+
+    def visit_FuncCall(self, function_call):
+        arguments = tuple(map(self.lower, function_call.args.exprs)) if function_call.args else ()
+        return Call(function_call.name.name, arguments)
+
+    def visit_Return(self, return_statement):
+        return Return(self.lower(return_statement.expr))
+
+    def visit_DeclList(self, decl_list):
+        return Sequence(tuple(map(self.lower, decl_list.decls)))
+
+    def visit_ExprList(self, expr_list):
+        return Sequence(tuple(map(self.lower, expr_list.exprs)))
+
+    def visit_Compound(self, compound_statement):
+        return Block(tuple(map(self.lower, compound_statement.block_items or ())))
+
+    def visit_If(self, if_statement):
+        return If(self.lower(if_statement.cond), self.lower(if_statement.iftrue),
+                  self._lower_optional(if_statement.iffalse))
+
+    def visit_While(self, while_statement):
+        return Loop(self._lower_optional(while_statement.cond), self.lower(while_statement.stmt))
+
+    def visit_DoWhile(self, do_while_statement):
+        return Loop(self._lower_optional(do_while_statement.cond), self.lower(do_while_statement.stmt),
+                    body_first=True)
+
+    def visit_For(self, for_statement):
+        # Declarations of the loop header are scoped by the loop
+        loop = Loop(self._lower_optional(for_statement.cond), self.lower(for_statement.stmt),
+                    self._lower_optional(for_statement.next))
+
+        if for_statement.init is None:
+            return Block((loop,))
+
+        return Block((self.lower(for_statement.init), loop))
+
+    def visit_Break(self, jump_statement):
+        # Unrolling does not model jumps, skipping them would give wrong values
+        raise MantarayNotImplemented(type(jump_statement).__name__)
+
+    visit_Continue = visit_Goto = visit_Break
+
+    def _lower_optional(self, node):
+        return self.lower(node) if node is not None else None
+
+    def generic_visit(self, node):
+        return Unsupported(node)
+
+
+lowerer = Lowerer()
+
+
+def lower(ast_node):
+    return lowerer.lower(ast_node)
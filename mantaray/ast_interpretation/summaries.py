@@ -0,0 +1,39 @@
+from mantaray.symbolic_execution.visitor import SETransformer
+
+
+class FunctionSummary:
+    """ Returned value of a function expressed over its parameters. Summary is computed once and instantiated at call
+    sites by substituting arguments for parameters. Summary without parameters stands for a function which can not
+    be summarized, so its calls are inlined. Loops truncated while computing the summary (see
+    `mantaray.ast_interpretation.interpreter.DECIDED_ITERATIONS_LIMIT`) are counted for every call site.
+    """
+    def __init__(self, parameters=None, value=None, truncated_loops_count=0):
+        self.parameters = parameters
+        self.value = value
+        self.truncated_loops_count = truncated_loops_count
+
+    @property
+    def is_inlined(self):
+        return self.parameters is None
+
+    def instantiate(self, arguments):
+        """ Returns the returned value for given conditionalized arguments
+        """
+        if self.value is None:
+            return None
+
+        return Substitutor(dict(zip(self.parameters, arguments))).substitute(self.value)
+
+
+class Substitutor(SETransformer):
+    """ Replaces variables in given expression with expressions. Shared subexpressions are substituted once.
+    """
+    transform_conditions = True
+
+    def __init__(self, substitution):
+        self.substitution = substitution
+        self.substitute = self.transform
+
+    def visit_Variable(self, variable):
+        return self.substitution.get(variable, variable)
+
@@ -0,0 +1,157 @@
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import time
+
+from mantaray import core
+from mantaray.ast_interpretation.cache import ASTCache
+from mantaray.ast_interpretation.call_analyzer import CallAnalyzer
+from mantaray.solving import solver
+from mantaray.solving.cache import ResultCache
+
+logger = logging.getLogger("batch")
+
+SOURCE_EXTENSIONS = (".c",)
+
+
+def collect_sources(paths, files_from=None):
+    """ Expands given files, directories (searched recursively for C sources) and glob patterns, as well as paths
+    listed one per line in `files_from`, into a sorted list of source files
+    """
+    paths = list(paths)
+
+    if files_from is not None:
+        with open(files_from, encoding="utf-8") as file:
+            paths.extend(line.strip() for line in file if line.strip())
+
+    sources = set()
+
+    for path in paths:
+        matches = glob.glob(path, recursive=True) if any(char in path for char in "*?[") else [path]
+
+        if not matches:
+            logger.warning("Nothing matches `{0}`".format(path))
+
+        for match in matches:
+            if os.path.isdir(match):
+                for directory, _, file_names in os.walk(match):
+                    sources.update(os.path.join(directory, file_name) for file_name in file_names
+                                   if file_name.endswith(SOURCE_EXTENSIONS))
+            elif os.path.isfile(match):
+                sources.add(match)
+            else:
+                logger.warning("File `{0}` not found".format(match))
+
+    return sorted(sources)
+
+
+def analyze_file(file_name, deepness):
+    """ Interprets all entry points of the file and returns JSON-serializable records, one per entry point.
+    Errors are reported in records instead of being raised.
+    """
+    started = time.perf_counter()
+
+    try:
+        ast = core.get_ast(file_name)
+    except Exception as error:
+        ast = None
+        parse_error = _describe_error(error)
+    else:
+        parse_error = "Parse error"
+
+    if ast is None:
+        return [_make_record(file_name, None, error=parse_error, timings={"parsing": time.perf_counter() - started})]
+
+    call_graph = CallAnalyzer.run(ast)
+    functions = call_graph.functions
+    parsing_time = time.perf_counter() - started
+    records = []
+
+    for entry_point in core.collect_entry_points(call_graph):
+        timings = {"parsing": parsing_time}
+        started = time.perf_counter()
+
+        try:
+            result = core.analyze_entry_point(functions, entry_point.name, deepness)
+            timings["interpretation"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            options = [{"condition": str(option.condition), "value": str(option.value)} for option in result.options]
+            timings["solving"] = time.perf_counter() - started
+        except Exception as error:
+            records.append(_make_record(file_name, entry_point, error=_describe_error(error), timings=timings))
+        else:
+            records.append(_make_record(file_name, entry_point, options=options, timings=timings,
+                                        statistics=result.statistics))
+
+    return records
+
+
+def run(sources, deepness, output, jobs=1):
+    """ Analyzes source files in `jobs` worker processes and writes results to `output` as JSON lines, as soon as
+    files are done. Returns the number of records with errors.
+    """
+    errors_count = 0
+    tasks = [(source, deepness) for source in sources]
+
+    def write(records):
+        nonlocal errors_count
+
+        for record in records:
+            output.write(json.dumps(record) + "\n")
+            errors_count += record["error"] is not None
+
+        output.flush()
+
+    if jobs == 1 or len(sources) < 2:
+        for task in tasks:
+            write(_analyze_task(task))
+        return errors_count
+
+    result_cache = solver.result_cache
+    cache_settings = (result_cache.path, result_cache.max_entries) if result_cache is not None else None
+    solver_settings = solver.solver_facade.settings
+
+    ast_cache_directory = core.ast_cache.directory if core.ast_cache is not None else None
+
+    with multiprocessing.Pool(min(jobs, len(sources)), initializer=_init_worker,
+                              initargs=(cache_settings, ast_cache_directory, solver_settings)) as pool:
+        for records in pool.imap_unordered(_analyze_task, tasks):
+            write(records)
+
+    return errors_count
+
+
+def _init_worker(cache_settings, ast_cache_directory, solver_settings):
+    solver.set_solver_settings(solver_settings)
+
+    # SQLite connection must not be shared with the parent process
+    solver.set_result_cache(ResultCache(*cache_settings) if cache_settings is not None else None)
+    core.set_ast_cache(ASTCache(ast_cache_directory) if ast_cache_directory is not None else None)
+
+
+def _analyze_task(task):
+    records = analyze_file(*task)
+
+    if solver.result_cache is not None:
+        solver.result_cache.commit()
+
+    return records
+
+
+def _make_record(file_name, function, options=None, error=None, timings=None, statistics=None):
+    return {
+        "file": file_name,
+        "function": function.name if function is not None else None,
+        "signature": str(function) if function is not None else None,
+        "options": options if options is not None else [],
+        "timings": timings if timings is not None else {},
+        "statistics": statistics if statistics is not None else {},
+        "error": error,
+    }
+
+
+def _describe_error(error):
+    return "{0}: {1}".format(type(error).__name__, error)
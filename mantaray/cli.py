@@ -1,17 +1,91 @@
 import click
+import json
+import os
 import sys
 import logging
 
+import mantaray.batch
 import mantaray.core
+from mantaray.ast_interpretation.cache import ASTCache
+from mantaray.solving.cache import ResultCache
+from mantaray.solving.facade import SolverSettings
+from mantaray.solving.solver import set_result_cache, set_solver_settings
+from mantaray.profiling import profiler
+from mantaray.tracing import tracer, TraceLevel, LoggingSink, JSONLinesSink
 from mantaray.__metadata__ import __version__, __author__, __author_email__, __description__, __title__
 
 
 @click.command()
 @click.option("--deepness", default=1, help="number of iterations for undecidable loops")
-@click.argument("filename", type=click.Path(exists=True))
-def main(filename, deepness):
-    logging.basicConfig(stream=sys.stdout, level=logging.DEBUG, format="[%(levelname)s] %(name)s: %(message)s")
-    mantaray.core.run(filename, deepness)
+@click.option("--cache", "cache_path", type=click.Path(dir_okay=False),
+              help="file of persistent cache for solver results")
+@click.option("--cache-size", default=1000000, help="maximum number of cached solver results")
+@click.option("--solver-timeout", default=0, type=click.IntRange(min=0),
+              help="time limit of a solver query in milliseconds (0 means no limit)")
+@click.option("--solver-rlimit", default=0, type=click.IntRange(min=0),
+              help="resource limit of a solver query (0 means no limit)")
+@click.option("--ast-cache", "ast_cache_path", type=click.Path(file_okay=False),
+              help="directory of cache for parsed sources")
+@click.option("--jobs", "-j", default=1, type=click.IntRange(min=0),
+              help="number of worker processes analyzing entry points or, in batch mode, files "
+                   "(0 means number of CPUs)")
+@click.option("--batch", is_flag=True,
+              help="analyze all given files, directories and glob patterns, writing results as JSON lines")
+@click.option("--files-from", type=click.Path(exists=True, dir_okay=False),
+              help="file listing paths to analyze in batch mode, one per line")
+@click.option("--output", "-o", type=click.File("w"), default="-", help="output file of batch mode")
+@click.option("--quiet", "-q", is_flag=True, help="report only warnings and errors")
+@click.option("--trace", "trace_file", type=click.File("w"), help="file to write all trace events to as JSON lines")
+@click.option("--profile", "profile_file", type=click.File("w"),
+              help="file to write JSON report of timings, option counts and memory usage to (implies --jobs 1)")
+@click.argument("filenames", nargs=-1)
+def main(filenames, deepness, cache_path, cache_size, solver_timeout, solver_rlimit, ast_cache_path, jobs, batch,
+         files_from, output, quiet, trace_file, profile_file):
+    if batch:
+        logging.basicConfig(stream=sys.stderr, level=logging.WARNING, format="[%(levelname)s] %(name)s: %(message)s")
+    else:
+        if files_from is not None or len(filenames) != 1 or not os.path.isfile(filenames[0]):
+            raise click.UsageError("Exactly one existing FILENAME is expected, use --batch to analyze many files")
+
+        logging.basicConfig(stream=sys.stdout, level=logging.DEBUG, format="[%(levelname)s] %(name)s: %(message)s")
+
+    tracer.add_sink(LoggingSink(), TraceLevel.WARNING if quiet or batch else TraceLevel.DEBUG)
+
+    if trace_file is not None:
+        tracer.add_sink(JSONLinesSink(trace_file), TraceLevel.DEBUG)
+
+    if ast_cache_path is not None:
+        mantaray.core.set_ast_cache(ASTCache(ast_cache_path))
+
+    set_solver_settings(SolverSettings(solver_timeout, solver_rlimit))
+
+    result_cache = ResultCache(cache_path, cache_size) if cache_path is not None else None
+    set_result_cache(result_cache)
+
+    if profile_file is not None:
+        # Profiler measures the current process only
+        jobs = 1
+        profiler.install()
+
+    try:
+        if batch:
+            sources = mantaray.batch.collect_sources(filenames, files_from)
+            errors_count = mantaray.batch.run(sources, deepness, output, jobs or os.cpu_count())
+            if errors_count:
+                sys.exit(1)
+        else:
+            mantaray.core.run(filenames[0], deepness, jobs or os.cpu_count())
+    finally:
+        if profile_file is not None:
+            profiler.uninstall()
+            json.dump(profiler.report(), profile_file, indent=4)
+            profile_file.close()
+
+        if result_cache is not None:
+            set_result_cache(None)
+            result_cache.close()
+
+        tracer.clear()
 
 
 if __name__ == "__main__":
@@ -1,62 +1,282 @@
-import logging
+import functools
+import itertools
+import multiprocessing
 import os
+import queue
 import sys
 from io import StringIO
 
 from pycparser import parse_file, c_parser
-from pycparser.c_ast import FuncCall, ID
 
 from mantaray.ast_interpretation.interpreter import ASTInterpreter
 from mantaray.ast_interpretation.call_analyzer import CallAnalyzer
+from mantaray.ast_interpretation.lowering import Call
+from mantaray.solving import solver
+from mantaray.solving.cache import ResultCache
 from mantaray.symbolic_execution.engine import SEEngine
+from mantaray.symbolic_execution.optionalizer import optionalize
+from mantaray.tracing import tracer, TraceLevel
 
-logger = logging.getLogger("core")
+ast_cache = None
 
 
-def run(file_name, deepness):
+def set_ast_cache(cache):
+    """ Sets the cache of parsed ASTs (see `mantaray.ast_interpretation.cache.ASTCache`) used by `get_ast`
+    """
+    global ast_cache
+    ast_cache = cache
+
+
+class FunctionResult:
+    """ Result of symbolic interpretation of a function. Results of entry points are values returned by them, results
+    of called functions are their summaries, i.e. values returned for unknown arguments. Result is truncated, when
+    paths of loops running too many iterations were cut off, so its options miss values returned by them.
+    """
+    def __init__(self, function_name, value, statistics=None, is_entry_point=True, domain=None):
+        self.function_name = function_name
+        self.value = value
+        self.statistics = statistics if statistics is not None else {}
+        self.is_entry_point = is_entry_point
+        self._domain = domain
+        self._options = None
+
+    @property
+    def options(self):
+        """ Feasible options of the returned value, computed on the first access using the abstract domain of the
+        interpretation, which statistics are updated then
+        """
+        if self._options is None:
+            self._options = [] if self.value is None else list(optionalize(self.value, self._domain))
+
+            if self._domain is not None:
+                self.statistics["domain"] = self._domain.statistics()
+
+        return self._options
+
+    @property
+    def is_truncated(self):
+        return self.statistics.get("truncated_loops", 0) > 0
+
+    def __str__(self):
+        return "`{0}` returned: `{1}`".format(self.function_name, self.value)
+
+
+def analyze(file_name, deepness=1, jobs=1):
+    """ Interprets all entry points of the given file in `jobs` worker processes and yields results of functions
+    (see `FunctionResult`) as soon as they are done. Results are produced lazily, so closing the generator stops the
+    analysis. A single worker interprets nothing ahead of the consumer, several ones interpret at most one entry point
+    each ahead of it.
+
+    Every summarized called function is yielded before the first entry point, which result depends on it. With
+    several workers, summaries of called functions are computed beforehand bottom-up over the condensed call graph:
+    functions whose callees are summarized are dispatched to workers together, and their summaries are shipped to
+    workers analyzing callers.
+    """
     ast = get_ast(file_name)
 
     if ast is None:
-        logger.error("Fatal error occurred during AST constructing.")
+        tracer.emit(TraceLevel.ERROR, "core", "fatal_error", "Fatal error occurred during AST constructing.")
+        return
+
+    call_graph = CallAnalyzer.run(ast)
+    functions = call_graph.functions
+
+    if tracer.is_enabled(TraceLevel.INFO):
+        call_table_str = ""
+        for function_descriptor in functions.values():
+            callees_str = ", calls: " + ", ".join(function_descriptor.callees) if function_descriptor.callees else ""
+            call_table_str += "    Function: `{0}`{1}\n".format(function_descriptor, callees_str)
+        tracer.emit(TraceLevel.INFO, "core", "call_analysis_completed", "Call analysis complete:\n{call_table}",
+                    call_table=call_table_str)
+
+    entry_points = collect_entry_points(call_graph)
+
+    if tracer.is_enabled(TraceLevel.INFO):
+        for entry_point in entry_points:
+            tracer.emit(TraceLevel.INFO, "core", "entry_point_found",
+                        "Function `{function}` considered as entry point.\n", function=entry_point)
+
+    entry_points_names = [entry_point.name for entry_point in entry_points]
+    summarization_levels = call_graph.get_summarization_levels()
+    workers_count = min(jobs, max([len(entry_points)] + [len(level) for level in summarization_levels]))
+
+    if workers_count < 2:
+        # Summaries are computed on demand while interpreting entry points
+        reported_names = set(entry_points_names)
+
+        for name in entry_points_names:
+            result = analyze_entry_point(functions, name, deepness)
+            yield from _collect_summaries_results(functions, reported_names)
+            yield result
+
         return
 
-    functions = CallAnalyzer.run(ast)
+    result_cache = solver.result_cache
+    cache_settings = (result_cache.path, result_cache.max_entries) if result_cache is not None else None
+    solver_settings = solver.solver_facade.settings
+
+    # Forked workers get the functions table copy-on-write, spawned ones get it serialized once by initializer
+    with multiprocessing.Pool(workers_count, initializer=_init_worker,
+                              initargs=(functions, deepness, cache_settings, solver_settings)) as pool:
+        summaries = {}
+        reported_names = set(entry_points_names)
+
+        for level in summarization_levels:
+            tasks = [(name, _select_summaries(summaries, functions[name].callees)) for name in level]
+
+            for name, summary in zip(level, pool.imap(_summarize_in_worker, tasks, chunksize=1)):
+                functions[name].summary = summaries[name] = summary
+                yield from _collect_summaries_results(functions, reported_names)
+
+        tasks = ((name, _select_summaries(summaries, functions[name].callees)) for name in entry_points_names)
+        yield from _imap_bounded(pool, _analyze_in_worker, tasks, workers_count)
+
+
+def run(file_name, deepness, jobs=1):
+    """ Interprets all entry points of the given file (see `analyze`), the results are returned in the order of entry
+    points names
+    """
+    results = {result.function_name: result for result in analyze(file_name, deepness, jobs) if result.is_entry_point}
+    return [results[name] for name in sorted(results)]
+
+
+def _imap_bounded(pool, function, tasks, window_size):
+    """ Yields results of the function applied to the tasks in order of completion, like `Pool.imap_unordered`, but
+    keeps at most `window_size` tasks submitted, so results do not pile up ahead of the consumer
+    """
+    completed = queue.Queue()
+    submitted_count = 0
+
+    for task in itertools.islice(tasks, window_size):
+        pool.apply_async(function, (task,), callback=completed.put, error_callback=completed.put)
+        submitted_count += 1
+
+    while submitted_count:
+        result = completed.get()
+        submitted_count -= 1
+
+        if isinstance(result, BaseException):
+            raise result
 
-    call_table_str = ""
-    for function_descriptor in functions.values():
-        callees_str = ", calls: " + ", ".join(function_descriptor.callees) if function_descriptor.callees else ""
-        call_table_str += "    Function: `{0}`{1}\n".format(function_descriptor, callees_str)
-    logger.info("Call analysis complete:\n{0}".format(call_table_str))
+        for task in itertools.islice(tasks, 1):
+            pool.apply_async(function, (task,), callback=completed.put, error_callback=completed.put)
+            submitted_count += 1
 
-    entry_points = collect_entry_points(functions)
-    for entry_point in entry_points:
-        logger.info("Function `{0}` considered as entry point.\n".format(entry_point))
-        symbolic_vm = SEEngine(deepness)
-        ast_interpreter = ASTInterpreter(symbolic_vm, functions)
-        entry_point_call = FuncCall(ID(entry_point.name), [])
-        result = ast_interpreter.interpret(entry_point_call)
+        yield result
+
+
+def _collect_summaries_results(functions, reported_names):
+    """ Returns results of functions summarized since the last call, except for given ones
+    """
+    results = []
+
+    for name, descriptor in sorted(functions.items()):
+        if name not in reported_names and descriptor.summary is not None and not descriptor.summary.is_inlined:
+            reported_names.add(name)
+            results.append(FunctionResult(name, descriptor.summary.value,
+                                          {"truncated_loops": descriptor.summary.truncated_loops_count},
+                                          is_entry_point=False))
+
+    return results
+
+
+def summarize(functions, name, deepness):
+    """ Computes summary of the function (see `mantaray.ast_interpretation.summaries.FunctionSummary`)
+    """
+    return ASTInterpreter(SEEngine(deepness), functions).summarize(functions[name])
+
+
+def analyze_entry_point(functions, name, deepness):
+    symbolic_vm = SEEngine(deepness)
+    ast_interpreter = ASTInterpreter(symbolic_vm, functions)
+    entry_point_call = Call(name, ())
+    value = ast_interpreter.interpret(entry_point_call)
+    statistics = {"domain": symbolic_vm.domain.statistics(), "truncated_loops": symbolic_vm.truncated_loops_count}
+
+    if tracer.is_enabled(TraceLevel.INFO):
+        tracer.emit(TraceLevel.INFO, "core", "domain_statistics",
+                    "Abstract domain decided {decided} of {queries} feasibility queries in `{function}` "
+                    "({hit_rate:.1%})", function=name, **statistics["domain"])
+
+    return FunctionResult(name, value, statistics, domain=symbolic_vm.domain)
+
+
+_worker_state = None
+
+
+def _init_worker(functions, deepness, cache_settings, solver_settings):
+    global _worker_state
+    _worker_state = functions, deepness
+    solver.set_solver_settings(solver_settings)
+
+    # SQLite connection must not be shared with the parent process
+    solver.set_result_cache(ResultCache(*cache_settings) if cache_settings is not None else None)
+
+
+def _select_summaries(summaries, names):
+    return {name: summaries[name] for name in names if name in summaries}
+
+
+def _install_summaries(summaries):
+    functions, _ = _worker_state
+
+    for name, summary in summaries.items():
+        functions[name].summary = summary
+
+
+def _summarize_in_worker(task):
+    name, summaries = task
+    _install_summaries(summaries)
+    functions, deepness = _worker_state
+    summary = summarize(functions, name, deepness)
+
+    if solver.result_cache is not None:
+        solver.result_cache.commit()
+
+    return summary
+
+
+def _analyze_in_worker(task):
+    name, summaries = task
+    _install_summaries(summaries)
+    functions, deepness = _worker_state
+    result = analyze_entry_point(functions, name, deepness)
+
+    if solver.result_cache is not None:
+        solver.result_cache.commit()
+
+    return result
 
 
 def get_ast(file_name):
     cpp_path = search_cpp()
     if cpp_path:
-        logger.info("{0} will be used as C preprocessor.".format(cpp_path))
+        if tracer.is_enabled(TraceLevel.INFO):
+            tracer.emit(TraceLevel.INFO, "core", "cpp_found", "{cpp_path} will be used as C preprocessor.",
+                        cpp_path=cpp_path)
     else:
-        logger.warning("C preprocessor not found. Only already preprocessed sources will be interpreted correctly.")
+        tracer.emit(TraceLevel.WARNING, "core", "cpp_not_found",
+                    "C preprocessor not found. Only already preprocessed sources will be interpreted correctly.")
 
     try:
-        ast = parse_file(file_name, use_cpp=cpp_path is not None, cpp_path=cpp_path)
+        if ast_cache is not None:
+            ast = ast_cache.get_ast(file_name, cpp_path)
+        else:
+            ast = parse_file(file_name, use_cpp=cpp_path is not None, cpp_path=cpp_path)
     except c_parser.ParseError:
         e = sys.exc_info()[1]
-        logger.error("Parse error: {0}.".format(str(e)))
+        tracer.emit(TraceLevel.ERROR, "core", "parse_error", "Parse error: {error}.", error=e)
         return
 
-    string_io = StringIO()
-    ast.show(buf=string_io, offset=4, attrnames=True, nodenames=True)
-    logger.info("{0} successfully parsed:\n{1}".format(file_name, string_io.getvalue()))
+    if tracer.is_enabled(TraceLevel.DEBUG):
+        string_io = StringIO()
+        ast.show(buf=string_io, offset=4, attrnames=True, nodenames=True)
+        tracer.emit(TraceLevel.DEBUG, "core", "file_parsed", "{file_name} successfully parsed:\n{ast}",
+                    file_name=file_name, ast=string_io.getvalue())
     return ast
 
 
+@functools.lru_cache(maxsize=None)
 def search_cpp():
     for cpp_name in ["cpp", "clang-cpp"]:
         for extension in ["", ".exe", ".bat", ".cmd"]:
@@ -85,14 +305,8 @@ def which(executable):
     return None
 
 
-def collect_entry_points(functions):
-    func_called = set()
-    for func in functions.values():
-        func_called = func_called.union(func.callees)
-
-    entry_points = set()
-    for func in functions.values():
-        if func.name not in func_called:
-            entry_points.add(func)
-
-    return entry_points
+def collect_entry_points(call_graph):
+    """ Returns functions, which are not called by functions outside of their strongly connected components of the
+    call graph, sorted by names
+    """
+    return [call_graph.functions[name] for name in call_graph.get_entry_points()]
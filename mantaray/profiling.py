@@ -0,0 +1,233 @@
+import functools
+import resource
+import sys
+import time
+
+from mantaray.symbolic_execution.expressions import get_children
+
+# Engine methods entering and leaving symbolic contexts
+_ENGINE_TRANSITIONS = (
+    "try_enter_function", "leave_function",
+    "try_enter_statement_block", "leave_statement_block",
+    "try_enter_conditional_statement", "leave_conditional_statement",
+    "try_enter_branch", "leave_branch",
+    "try_enter_loop_iteration", "leave_loop_iteration",
+)
+
+
+def get_dag_size(s_expression):
+    """ Returns the number of distinct subexpressions of the expression
+    """
+    visited = set()
+    stack = [s_expression]
+
+    while stack:
+        node = stack.pop()
+
+        if node not in visited:
+            visited.add(node)
+            stack.extend(get_children(node))
+
+    return len(visited)
+
+
+def get_context_depth(context):
+    depth = 0
+
+    while context.outer_context is not None:
+        context = context.outer_context
+        depth += 1
+
+    return depth
+
+
+class HookStatistics:
+    """ Timings of calls of a single hooked function
+    """
+    def __init__(self):
+        self.durations = []
+        self.dag_sizes = []
+
+    def report(self):
+        durations = sorted(self.durations)
+        report = {
+            "count": len(durations),
+            "total": sum(durations),
+            "mean": sum(durations) / len(durations) if durations else 0.0,
+            "p50": _get_percentile(durations, 0.5),
+            "p90": _get_percentile(durations, 0.9),
+            "p99": _get_percentile(durations, 0.99),
+            "max": durations[-1] if durations else 0.0,
+        }
+
+        if self.dag_sizes:
+            report["dag_size"] = {
+                "mean": sum(self.dag_sizes) / len(self.dag_sizes),
+                "max": max(self.dag_sizes),
+            }
+
+        return report
+
+
+def _get_percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class Profiler:
+    """ Measures where analysis time and memory go. Hooks wrap engine context transitions, updates of variables,
+    optionalization, parsing and solver entry points, so nothing is measured until they are installed. Functions are
+    replaced in every `mantaray` module which imported them, and restored when hooks are uninstalled.
+
+    Profiler measures the current process only.
+    """
+    def __init__(self):
+        self.hooks = {}
+        self.peak_context_depth = 0
+        self.peak_options_count = 0
+        self._installed = []
+        self._started = None
+
+    @property
+    def is_installed(self):
+        return bool(self._installed)
+
+    def install(self):
+        if self.is_installed:
+            return
+
+        from mantaray import core
+        from mantaray.solving import solver
+        from mantaray.symbolic_execution import contexts, engine, optionalizer
+
+        for name in _ENGINE_TRANSITIONS:
+            self._hook_attribute(engine.SEEngine, name, "engine." + name, observe=self._observe_transition)
+
+        self._hook_attribute(contexts.SymbolicContext, "update_variable", "context.update_variable",
+                             observe=self._observe_update)
+        self._hook_attribute(solver.SolverSession, "add", "solver.session_add")
+        self._hook_attribute(solver.SolverSession, "check", "solver.session_check")
+        self._hook_function(solver, "check", "solver.check", measure_argument=True)
+        self._hook_function(solver, "se_simplify", "solver.se_simplify", measure_argument=True)
+        self._hook_function(solver, "check_all", "solver.check_all")
+        self._hook_function(solver, "se_simplify_all", "solver.se_simplify_all")
+        self._hook_function(optionalizer, "optionalize", "optionalize", measure_argument=True, generator=True)
+        self._hook_function(core, "get_ast", "parsing")
+        self._started = time.perf_counter()
+
+    def uninstall(self):
+        for owner, name, original in reversed(self._installed):
+            setattr(owner, name, original)
+
+        self._installed = []
+
+    def reset(self):
+        # Installed hooks keep references to their statistics
+        for statistics in self.hooks.values():
+            statistics.durations.clear()
+            statistics.dag_sizes.clear()
+
+        self.peak_context_depth = 0
+        self.peak_options_count = 0
+        self._started = time.perf_counter() if self.is_installed else None
+
+    def report(self):
+        """ Returns JSON-serializable report of all measurements
+        """
+        from mantaray.solving import solver
+
+        counterexample_cache = solver.counterexample_cache
+
+        return {
+            "wall_time": time.perf_counter() - self._started if self._started is not None else 0.0,
+            "hooks": {name: statistics.report() for name, statistics in sorted(self.hooks.items())},
+            "peak_context_depth": self.peak_context_depth,
+            "peak_options_count": self.peak_options_count,
+            "counterexample_cache": counterexample_cache.statistics() if counterexample_cache is not None else None,
+            # Linux reports the maximum resident set size in kilobytes, macOS in bytes
+            "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024),
+        }
+
+    def _get_statistics(self, label):
+        statistics = self.hooks.get(label, None)
+
+        if statistics is None:
+            statistics = self.hooks[label] = HookStatistics()
+
+        return statistics
+
+    def _observe_transition(self, arguments, result):
+        self.peak_context_depth = max(self.peak_context_depth, get_context_depth(arguments[0].current_context))
+
+    def _observe_update(self, arguments, result):
+        context, variable = arguments[0], arguments[1]
+        self.peak_options_count = max(self.peak_options_count, len(context.variables_options[variable]))
+
+    def _hook_attribute(self, owner, name, label, observe=None):
+        original = owner.__dict__[name]
+        setattr(owner, name, self._wrap(original, label, observe, False))
+        self._installed.append((owner, name, original))
+
+    def _hook_function(self, module, name, label, measure_argument=False, generator=False):
+        original = getattr(module, name)
+        wrapper = self._wrap_generator(original, label) if generator else \
+            self._wrap(original, label, None, measure_argument)
+
+        for module_name, other_module in list(sys.modules.items()):
+            if module_name.split(".")[0] == "mantaray" and getattr(other_module, name, None) is original:
+                setattr(other_module, name, wrapper)
+                self._installed.append((other_module, name, original))
+
+    def _wrap(self, original, label, observe, measure_argument):
+        statistics = self._get_statistics(label)
+
+        @functools.wraps(original)
+        def wrapper(*arguments, **keywords):
+            if measure_argument:
+                statistics.dag_sizes.append(get_dag_size(arguments[0]))
+
+            started = time.perf_counter()
+
+            try:
+                result = original(*arguments, **keywords)
+            finally:
+                statistics.durations.append(time.perf_counter() - started)
+
+            if observe is not None:
+                observe(arguments, result)
+
+            return result
+
+        return wrapper
+
+    def _wrap_generator(self, original, label):
+        # Only the time spent producing items is measured, not the time consumers spend between them
+        statistics = self._get_statistics(label)
+
+        @functools.wraps(original)
+        def wrapper(*arguments, **keywords):
+            statistics.dag_sizes.append(get_dag_size(arguments[0]))
+            duration = 0.0
+            iterator = original(*arguments, **keywords)
+
+            try:
+                while True:
+                    started = time.perf_counter()
+
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        duration += time.perf_counter() - started
+
+                    yield item
+            finally:
+                statistics.durations.append(duration)
+
+        return wrapper
+
+
+profiler = Profiler()
@@ -0,0 +1,275 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+
+import z3
+
+from mantaray.errors import MantarayError, MantarayNotImplemented
+from mantaray.solving.facade import SolverResult
+from mantaray.symbolic_execution.expressions import Variable, Literal, BinaryOperator, UnaryOperator, Conditional, \
+    Option, BinaryOperatorType, UnaryOperatorType, And, Or, get_children
+from mantaray.symbolic_execution.type import SEType
+from mantaray.utils import LRUCache
+
+logger = logging.getLogger("cache")
+
+CANONICAL_FORM_VERSION = 3
+MEMORY_CACHE_SIZE = 4096
+
+_encoded_results = {SolverResult.SAT: "1", SolverResult.UNSAT: "0"}
+_decoded_results = {value: result for result, value in _encoded_results.items()}
+
+
+class CanonicalForm:
+    """ Canonical textual form of a symbolic expression, which does not depend on names and contexts of variables.
+    Variables are alpha-renamed by the order of their first occurrence, shared subexpressions are encoded once.
+    """
+    def __init__(self, s_expression):
+        self.variables = []
+        self._variables_indices = {}
+        self.text = self._encode(s_expression, True)
+
+    def encode(self, s_expression):
+        """ Encodes another expression (e.g. a result of the query) using variables numbering of this form.
+        Returns None if the expression refers to variables which do not occur in the form.
+        """
+        return self._encode(s_expression, False)
+
+    def _encode(self, s_expression, numbering_variables):
+        nodes = []
+        indices = {}
+        stack = [(s_expression, False)]
+
+        while stack:
+            node, children_encoded = stack.pop()
+
+            if node in indices:
+                continue
+
+            if not children_encoded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(get_children(node)))
+                continue
+
+            if isinstance(node, Variable):
+                index = self._variables_indices.get(node, None)
+
+                if index is None:
+                    if not numbering_variables:
+                        return None
+
+                    index = len(self.variables)
+                    self.variables.append(node)
+                    self._variables_indices[node] = index
+
+                entry = ["v", index, node.se_type.value]
+            elif isinstance(node, Literal):
+                entry = ["l", node.value, node.se_type.value]
+            elif isinstance(node, BinaryOperator):
+                entry = ["b", node.bop_type.value, indices[node.argument1], indices[node.argument2]]
+            elif isinstance(node, UnaryOperator):
+                entry = ["u", node.op_type.value, indices[node.argument]]
+            elif isinstance(node, And):
+                entry = ["a", [indices[argument] for argument in node.arguments]]
+            elif isinstance(node, Or):
+                entry = ["o", [indices[argument] for argument in node.arguments]]
+            elif isinstance(node, Conditional):
+                entry = ["c", node.se_type.value,
+                         [[indices[option.condition], indices[option.value]] for option in node.options]]
+            else:
+                raise MantarayNotImplemented(type(node).__name__)
+
+            indices[node] = len(nodes)
+            nodes.append(entry)
+
+        return json.dumps(nodes, separators=(",", ":"))
+
+    def decode(self, text):
+        """ Rebuilds an expression encoded using variables numbering of this form
+        """
+        nodes = []
+
+        for entry in json.loads(text):
+            kind = entry[0]
+
+            if kind == "v":
+                node = self.variables[entry[1]]
+            elif kind == "l":
+                node = Literal(entry[1], SEType(entry[2]))
+            elif kind == "b":
+                node = BinaryOperator(nodes[entry[2]], nodes[entry[3]], BinaryOperatorType(entry[1]))
+            elif kind == "u":
+                node = UnaryOperator(nodes[entry[2]], UnaryOperatorType(entry[1]))
+            elif kind == "a":
+                node = And([nodes[argument] for argument in entry[1]])
+            elif kind == "o":
+                node = Or([nodes[argument] for argument in entry[1]])
+            elif kind == "c":
+                node = Conditional(SEType(entry[1]),
+                                   [Option(nodes[condition], nodes[value]) for condition, value in entry[2]])
+            else:
+                raise MantarayError("Malformed canonical form entry: `{0}`".format(entry))
+
+            nodes.append(node)
+
+        return nodes[-1]
+
+
+class ResultCache:
+    """ Persistent SQLite cache of simplification and satisfiability results keyed by canonical forms of queries,
+    so identical queries hit across functions and runs. Size is bounded by evicting the least recently used results.
+    The cache is shared by analysis threads: the connection is guarded by a lock, which is released while misses are
+    computed.
+    """
+    def __init__(self, path, max_entries=1000000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory = LRUCache(MEMORY_CACHE_SIZE)
+        self._uncommitted = 0
+        self._key_prefix = "{0}:{1}:".format(CANONICAL_FORM_VERSION, z3.get_version_string())
+        self._lock = threading.RLock()
+
+        self._connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=OFF")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS results "
+                                 "(key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used INTEGER NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self._clock = self._connection.execute("SELECT COALESCE(MAX(last_used), 0) FROM results").fetchone()[0]
+        self._size = self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def simplify(self, s_expression, simplify):
+        """ Returns cached simplified form of the expression, calling `simplify` on miss
+        """
+        return self._lookup("simplify", s_expression, simplify, lambda form, result: form.encode(result),
+                            lambda form, value: form.decode(value))
+
+    def simplify_all(self, s_expressions, simplify_all):
+        """ Returns cached simplified forms of the expressions, calling `simplify_all` once for all misses
+        """
+        return self._lookup_all("simplify", s_expressions, simplify_all, lambda form, result: form.encode(result),
+                                lambda form, value: form.decode(value))
+
+    def check(self, s_expression, check):
+        """ Returns cached satisfiability of the expression, calling `check` on miss. Unknown results depend on solver
+        limits, so they are not stored persistently.
+        """
+        return self._lookup("sat", s_expression, check, lambda form, result: _encoded_results.get(result, None),
+                            lambda form, value: _decoded_results[value])
+
+    def check_all(self, s_expressions, check_all):
+        """ Returns cached satisfiability of the expressions, calling `check_all` once for all misses
+        """
+        return self._lookup_all("sat", s_expressions, check_all,
+                                lambda form, result: _encoded_results.get(result, None),
+                                lambda form, value: _decoded_results[value])
+
+    def statistics(self):
+        with self._lock:
+            queries = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / queries if queries else 0.0,
+                "evictions": self.evictions,
+                "entries": self._size,
+            }
+
+    def commit(self):
+        with self._lock:
+            self._connection.commit()
+            self._uncommitted = 0
+
+    def close(self):
+        statistics = self.statistics()
+        logger.info("Result cache `{0}`: {1} hits, {2} misses ({3:.1%}), {4} evictions, {5} entries".format(
+            self.path, statistics["hits"], statistics["misses"], statistics["hit_rate"], statistics["evictions"],
+            statistics["entries"]))
+
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def _lookup(self, kind, s_expression, compute, encode, decode):
+        return self._lookup_all(kind, [s_expression], lambda s_expressions: [compute(s_expressions[0])], encode,
+                                decode)[0]
+
+    def _lookup_all(self, kind, s_expressions, compute_all, encode, decode):
+        results = [None] * len(s_expressions)
+        misses = []
+
+        with self._lock:
+            for index, s_expression in enumerate(s_expressions):
+                result = self._memory.get((kind, s_expression), None)
+
+                if result is not None:
+                    self.hits += 1
+                    results[index] = result
+                    continue
+
+                form = CanonicalForm(s_expression)
+                key = hashlib.sha256((self._key_prefix + kind + ":" + form.text).encode("utf-8")).hexdigest()
+                self._clock += 1
+                row = self._connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+
+                if row is not None:
+                    self.hits += 1
+                    results[index] = result = decode(form, row[0])
+                    self._execute("UPDATE results SET last_used = ? WHERE key = ?", (self._clock, key))
+                    self._memory[(kind, s_expression)] = result
+                else:
+                    self.misses += 1
+                    misses.append((index, form, key))
+
+        if not misses:
+            return results
+
+        # Other threads may use the cache meanwhile, the same query computed twice is stored twice
+        computed = compute_all([s_expressions[index] for index, _, _ in misses])
+
+        with self._lock:
+            for (index, form, key), result in zip(misses, computed):
+                value = encode(form, result)
+
+                if value is not None:
+                    # Another thread may have stored the same miss meanwhile, only new rows add to the size
+                    cursor = self._execute("INSERT OR IGNORE INTO results (key, value, last_used) VALUES (?, ?, ?)",
+                                           (key, value, self._clock))
+
+                    if cursor.rowcount > 0:
+                        self._size += 1
+
+                        if self._size > self.max_entries:
+                            self._evict()
+                    else:
+                        self._execute("UPDATE results SET value = ?, last_used = ? WHERE key = ?",
+                                      (value, self._clock, key))
+
+                results[index] = result
+                self._memory[(kind, s_expressions[index])] = result
+
+        return results
+
+    def _evict(self):
+        """ Evicts a tenth of the least recently used results
+        """
+        count = max(1, self.max_entries // 10)
+        self._execute("DELETE FROM results WHERE key IN "
+                      "(SELECT key FROM results ORDER BY last_used LIMIT ?)", (count,))
+        self._size = self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        self.evictions += count
+
+    def _execute(self, statement, parameters):
+        cursor = self._connection.execute(statement, parameters)
+        self._uncommitted += 1
+
+        if self._uncommitted >= 256:
+            self._connection.commit()
+            self._uncommitted = 0
+
+        return cursor
@@ -0,0 +1,266 @@
+import threading
+from collections import OrderedDict, deque
+from fractions import Fraction
+
+from mantaray.solving.facade import SolverResult
+from mantaray.symbolic_execution.expressions import Variable, Literal, BinaryOperator, UnaryOperator, Conditional, \
+    And, Or, BinaryOperatorType, UnaryOperatorType, get_children, get_conjuncts
+from mantaray.symbolic_execution.type import SEType
+from mantaray.utils import LRUCache
+
+MAX_MODELS = 32
+MAX_CORES = 4096
+MAX_EVALUATED_CONJUNCTS = 4096
+
+_default_values = {
+    SEType.BOOL: False,
+    SEType.INT: 0,
+    SEType.FLOAT: Fraction(0),
+}
+
+_operations = {
+    BinaryOperatorType.ADD: lambda value1, value2: value1 + value2,
+    BinaryOperatorType.MINUS: lambda value1, value2: value1 - value2,
+    BinaryOperatorType.MUL: lambda value1, value2: value1 * value2,
+    BinaryOperatorType.EQ: lambda value1, value2: value1 == value2,
+    BinaryOperatorType.NE: lambda value1, value2: value1 != value2,
+    BinaryOperatorType.GT: lambda value1, value2: value1 > value2,
+    BinaryOperatorType.GE: lambda value1, value2: value1 >= value2,
+    BinaryOperatorType.LT: lambda value1, value2: value1 < value2,
+    BinaryOperatorType.LE: lambda value1, value2: value1 <= value2,
+}
+
+
+def evaluate(s_expression, model, values=None):
+    """ Evaluates the expression concretely the same way the solver does, using values of variables from the model
+    (variables missing from it take default values of their types). Returns None if the value is not determined by
+    the model, e.g. for division by zero or a conditional, none of which options holds. Values of subexpressions are
+    kept in `values`, so it may be shared by evaluations of expressions over the same model.
+    """
+    values = values if values is not None else {}
+    stack = [(s_expression, False)]
+
+    while stack:
+        node, children_evaluated = stack.pop()
+
+        if node in values:
+            continue
+
+        if not children_evaluated:
+            children = get_children(node)
+
+            if children:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children if child not in values)
+                continue
+
+        values[node] = _evaluate_node(node, model, values)
+
+    return values[s_expression]
+
+
+def _evaluate_node(node, model, values):
+    if isinstance(node, Variable):
+        value = model.get(node, None)
+        return value if value is not None else _default_values.get(node.se_type, None)
+
+    if isinstance(node, Literal):
+        return _get_literal_value(node)
+
+    if isinstance(node, And):
+        arguments = [values[argument] for argument in node.arguments]
+        return False if False in arguments else None if None in arguments else True
+
+    if isinstance(node, Or):
+        arguments = [values[argument] for argument in node.arguments]
+        return True if True in arguments else None if None in arguments else False
+
+    if isinstance(node, UnaryOperator):
+        argument = values[node.argument]
+        return not argument if node.op_type is UnaryOperatorType.NOT and argument is not None else None
+
+    if isinstance(node, BinaryOperator):
+        value1 = values[node.argument1]
+        value2 = values[node.argument2]
+
+        if value1 is None or value2 is None:
+            return None
+
+        if node.bop_type is BinaryOperatorType.DIV:
+            return _divide(node, value1, value2)
+
+        operation = _operations.get(node.bop_type, None)
+        return operation(value1, value2) if operation is not None else None
+
+    if isinstance(node, Conditional):
+        # The first option which condition holds is taken, as in translation into the solver
+        for option in node.options:
+            condition = values[option.condition]
+
+            if condition is not False:
+                return values[option.value] if condition is True else None
+
+        return None
+
+    return None
+
+
+def _get_literal_value(literal):
+    try:
+        if literal.se_type is SEType.INT:
+            return int(literal.value)
+
+        if literal.se_type is SEType.FLOAT:
+            return Fraction(str(literal.value))
+    except ValueError:
+        return None
+
+    if literal.se_type is SEType.BOOL and isinstance(literal.value, bool):
+        return literal.value
+
+    return None
+
+
+def _divide(node, value1, value2):
+    # Division by zero is left unspecified by the solver
+    if value2 == 0:
+        return None
+
+    if node.argument1.get_se_type() is SEType.INT and node.argument2.get_se_type() is SEType.INT:
+        # Integer division of the solver rounds so that the remainder is non-negative
+        quotient = value1 // abs(value2)
+        return quotient if value2 > 0 else -quotient
+
+    return Fraction(value1) / value2
+
+
+class _Model:
+    """ Assignment of variables along with values of conjuncts evaluated under it, since consecutive queries share
+    most of their conjuncts
+    """
+    def __init__(self, assignment):
+        self.assignment = assignment
+        self.conjuncts_values = LRUCache(MAX_EVALUATED_CONJUNCTS)
+
+    def satisfies(self, conjuncts):
+        values = {}
+
+        for conjunct in conjuncts:
+            value = self.conjuncts_values.get(conjunct, None)
+
+            if value is None:
+                value = self.conjuncts_values[conjunct] = evaluate(conjunct, self.assignment, values) is True
+
+            if not value:
+                return False
+
+        return True
+
+
+class CounterexampleCache:
+    """ Answers satisfiability queries without the solver in the spirit of KLEE counterexample cache. Queries are
+    sets of conjuncts. Satisfying models of recent queries are tried first, since queries are mostly small changes of
+    earlier ones, so the same assignment often satisfies them too. Queries which contain a known unsatisfiable core
+    are unsatisfiable. Cores are indexed by one of their conjuncts, so only cores sharing a conjunct with the query
+    are considered.
+
+    The cache is shared by threads, so models and cores are accessed under the lock, while the solver is called
+    outside of it.
+    """
+    def __init__(self, max_models=MAX_MODELS, max_cores=MAX_CORES):
+        self.max_cores = max_cores
+        self.model_hits = 0
+        self.core_hits = 0
+        self.misses = 0
+        self._models = deque(maxlen=max_models)
+        self._cores = OrderedDict()
+        self._watched_cores = {}
+        self._lock = threading.Lock()
+
+    def decide(self, conjuncts):
+        """ Returns satisfiability of the conjunction decided by cached cores and models, or None
+        """
+        conjuncts = frozenset(conjuncts)
+
+        with self._lock:
+            for conjunct in conjuncts:
+                for core in self._watched_cores.get(conjunct, ()):
+                    if core <= conjuncts:
+                        self.core_hits += 1
+                        self._cores.move_to_end(core)
+                        return SolverResult.UNSAT
+
+            # Models are reordered when one of them satisfies the query
+            for model in list(self._models):
+                if model.satisfies(conjuncts):
+                    self.model_hits += 1
+
+                    if model is not self._models[0]:
+                        self._models.remove(model)
+                        self._models.appendleft(model)
+
+                    return SolverResult.SAT
+
+            self.misses += 1
+            return None
+
+    def add(self, result, model=None, core=None):
+        """ Stores the model (see `SolverFacade.get_model`) of satisfiable query or the core of unsatisfiable one
+        """
+        with self._lock:
+            self._add(result, model, core)
+
+    def _add(self, result, model, core):
+        if result is SolverResult.SAT and model is not None:
+            self._models.appendleft(_Model(model))
+        elif result is SolverResult.UNSAT and core:
+            core = frozenset(core)
+
+            if core in self._cores:
+                return
+
+            self._cores[core] = watched = next(iter(core))
+            self._watched_cores.setdefault(watched, []).append(core)
+
+            if len(self._cores) > self.max_cores:
+                evicted, watched = self._cores.popitem(last=False)
+                self._watched_cores[watched].remove(evicted)
+
+                if not self._watched_cores[watched]:
+                    del self._watched_cores[watched]
+
+    def check(self, s_expression, solve):
+        """ Returns satisfiability of the expression, calling `solve` (see `SolverFacade.solve`) when cache can not
+        decide it
+        """
+        result = self.decide(get_conjuncts(s_expression))
+
+        if result is None:
+            result, model, core = solve(s_expression)
+            self.add(result, model, core)
+
+        return result
+
+    def check_all(self, s_expressions, solve_all):
+        """ Returns satisfiability of every expression, calling `solve_all` once for all undecided ones
+        """
+        results = [self.decide(get_conjuncts(s_expression)) for s_expression in s_expressions]
+        undecided = [index for index, result in enumerate(results) if result is None]
+
+        for index, (result, model, core) in zip(undecided, solve_all([s_expressions[index] for index in undecided])):
+            self.add(result, model, core)
+            results[index] = result
+
+        return results
+
+    def statistics(self):
+        with self._lock:
+            queries = self.model_hits + self.core_hits + self.misses
+            return {
+                "model_hits": self.model_hits,
+                "core_hits": self.core_hits,
+                "misses": self.misses,
+                "hit_rate": (self.model_hits + self.core_hits) / queries if queries else 0.0,
+                "models": len(self._models),
+                "cores": len(self._cores),
+            }
@@ -0,0 +1,243 @@
+import threading
+from enum import Enum
+from fractions import Fraction
+
+import z3
+
+from mantaray.solving import se2smt, smt2se
+from mantaray.symbolic_execution.expressions import BinaryOperator, BinaryOperatorType, Literal, Variable, \
+    Conditional, get_children, get_conjuncts
+from mantaray.symbolic_execution.type import SEType
+from mantaray.tracing import tracer, TraceLevel
+
+
+class SolverResult(Enum):
+    """ Enum class to represent results of satisfiability checks
+    """
+
+    SAT = "sat"
+    UNSAT = "unsat"
+    UNKNOWN = "unknown"
+
+    def __str__(self):
+        return self.value
+
+    @property
+    def maybe_sat(self):
+        """ Unknown results are treated as satisfiable, so a feasible path is never dropped because of limits
+        """
+        return self is not SolverResult.UNSAT
+
+
+class SolverSettings:
+    """ Limits and tactics of solver queries. Timeout is in milliseconds and rlimit is in Z3 resource units, zero means
+    no limit. Queries are solved by solvers for given SMT-LIB logics: linear integer ones by the linear logic and all
+    others, i.e. nonlinear or referring to floating point terms, by the nonlinear logic. None stands for the default Z3
+    solver.
+    """
+    def __init__(self, timeout=0, rlimit=0, linear_logic="QF_LIA", nonlinear_logic="QF_NIRA"):
+        self.timeout = timeout
+        self.rlimit = rlimit
+        self.linear_logic = linear_logic
+        self.nonlinear_logic = nonlinear_logic
+
+
+_nonlinear_operators = (BinaryOperatorType.MUL, BinaryOperatorType.DIV)
+
+
+def is_linear_integer(s_expression):
+    """ Checks whether the expression belongs to linear integer arithmetic, i.e. it refers to no floating point terms,
+    which are translated into reals, and multiplies or divides by constants only
+    """
+    visited = set()
+    stack = [s_expression]
+
+    while stack:
+        node = stack.pop()
+
+        if node in visited:
+            continue
+
+        visited.add(node)
+
+        if isinstance(node, (Variable, Literal, Conditional)) and node.se_type is SEType.FLOAT:
+            return False
+
+        if isinstance(node, BinaryOperator) and node.bop_type in _nonlinear_operators and \
+                not isinstance(node.argument1, Literal) and not isinstance(node.argument2, Literal):
+            return False
+
+        stack.extend(get_children(node))
+
+    return True
+
+
+class SolverFacade:
+    """ Entry point of all solver queries, which applies limits and tactics of the settings. Every thread gets its
+    own Z3 context along with translations into it, since Z3 contexts are not thread-safe. The main thread uses the
+    main Z3 context.
+    """
+    def __init__(self, settings=None):
+        self.settings = settings if settings is not None else SolverSettings()
+        self._local = threading.local()
+
+    def check(self, s_expression):
+        """ Returns satisfiability of the expression
+        """
+        solver = self.create_solver(self._get_logic(s_expression))
+        solver.add(self.translate(s_expression))
+        return self.get_result(solver)
+
+    def check_all(self, s_expressions):
+        """ Returns satisfiability of every expression (see `solve_all`)
+        """
+        return [result for result, _, _ in self.solve_all(s_expressions)]
+
+    def solve(self, s_expression):
+        """ Returns satisfiability of the expression along with a model (see `get_model`) if it is satisfiable, or an
+        unsat core, i.e. the set of its conjuncts which are unsatisfiable together, if it is not
+        """
+        conjuncts = get_conjuncts(s_expression)
+        solver = self.create_solver(self._get_logic(s_expression))
+        ctx = self._get_converters().se2smt.ctx
+        assumptions = {}
+
+        # Conjuncts are tracked by assumption literals, so the solver reports which of them form the core
+        for index, conjunct in enumerate(conjuncts):
+            assumption = z3.Bool("__assumption_{0}".format(index), ctx)
+            solver.add(z3.Implies(assumption, self.translate(conjunct)))
+            assumptions[assumption.decl().name()] = (assumption, conjunct)
+
+        result = self.get_result(solver, *[assumption for assumption, _ in assumptions.values()])
+
+        if result is SolverResult.SAT:
+            return result, self.get_model(solver.model()), None
+
+        if result is SolverResult.UNSAT:
+            return result, None, frozenset(assumptions[literal.decl().name()][1] for literal in solver.unsat_core())
+
+        return result, None, None
+
+    def solve_all(self, s_expressions):
+        """ Solves every expression (see `solve`). Expressions are guarded by assumption literals of a single
+        incremental solver, so they are translated into one context and the solver is set up once for all of them.
+        Cores of unsatisfiable expressions are all their conjuncts.
+        """
+        if not s_expressions:
+            return []
+
+        solver = self.create_solver(self._get_logic(*s_expressions))
+        ctx = self._get_converters().se2smt.ctx
+        solutions = []
+
+        for index, s_expression in enumerate(s_expressions):
+            assumption = z3.Bool("__assumption_{0}".format(index), ctx)
+            solver.add(z3.Implies(assumption, self.translate(s_expression)))
+            result = self.get_result(solver, assumption)
+
+            if result is SolverResult.SAT:
+                solutions.append((result, self.get_model(solver.model()), None))
+            elif result is SolverResult.UNSAT:
+                solutions.append((result, None, frozenset(get_conjuncts(s_expression))))
+            else:
+                solutions.append((result, None, None))
+
+        return solutions
+
+    def get_model(self, model):
+        """ Returns values of variables assigned by Z3 model, numbers are given as `int` and `Fraction`. Values which
+        can not be represented exactly, e.g. irrational ones, are omitted.
+        """
+        symbols = self._get_converters().se2smt.symbols
+        values = {}
+
+        for declaration in model.decls():
+            variable = symbols.get(declaration.name(), None)
+
+            if variable is None:
+                continue
+
+            value = model[declaration]
+
+            if z3.is_true(value) or z3.is_false(value):
+                values[variable] = z3.is_true(value)
+            elif z3.is_int_value(value):
+                values[variable] = value.as_long()
+            elif z3.is_rational_value(value):
+                values[variable] = Fraction(value.numerator_as_long(), value.denominator_as_long())
+
+        return values
+
+    def simplify(self, s_expression):
+        converters = self._get_converters()
+        smt_expression = converters.se2smt.transform(s_expression)
+        return converters.smt2se.transform(z3.simplify(smt_expression))
+
+    def simplify_all(self, s_expressions):
+        """ Simplifies every expression, translations of subexpressions shared among them are made once
+        """
+        converters = self._get_converters()
+        return [converters.smt2se.transform(z3.simplify(converters.se2smt.transform(s_expression)))
+                for s_expression in s_expressions]
+
+    def translate(self, s_expression):
+        return self._get_converters().se2smt.transform(s_expression)
+
+    def create_solver(self, logic=None):
+        """ Returns a new solver of the thread context for the logic, with limits of the settings
+        """
+        ctx = self._get_converters().se2smt.ctx
+
+        if logic is None:
+            solver = z3.Solver(ctx=ctx)
+        else:
+            solver = z3.SolverFor(logic, ctx=ctx)
+
+        if self.settings.timeout:
+            solver.set("timeout", self.settings.timeout)
+
+        if self.settings.rlimit:
+            solver.set("rlimit", self.settings.rlimit)
+
+        return solver
+
+    @staticmethod
+    def get_result(solver, *assumptions):
+        result = solver.check(*assumptions)
+
+        if result == z3.sat:
+            return SolverResult.SAT
+
+        if result == z3.unsat:
+            return SolverResult.UNSAT
+
+        if tracer.is_enabled(TraceLevel.INFO):
+            tracer.emit(TraceLevel.INFO, "solver", "unknown_result",
+                        "Solver gave up ({reason}), the query is treated as satisfiable",
+                        reason=solver.reason_unknown())
+
+        return SolverResult.UNKNOWN
+
+    def _get_logic(self, *s_expressions):
+        if all(map(is_linear_integer, s_expressions)):
+            return self.settings.linear_logic
+
+        return self.settings.nonlinear_logic
+
+    def _get_converters(self):
+        converters = getattr(self._local, "converters", None)
+
+        if converters is None:
+            converters = self._local.converters = _Converters()
+
+        return converters
+
+
+class _Converters:
+    def __init__(self):
+        if threading.current_thread() is threading.main_thread():
+            self.se2smt = se2smt.se2smt_converter
+            self.smt2se = smt2se.smt2se_converter
+        else:
+            self.se2smt = se2smt.SE2SMTConverter(ctx=z3.Context())
+            self.smt2se = smt2se.SMT2SEConverter(self.se2smt.symbols)
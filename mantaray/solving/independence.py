@@ -0,0 +1,96 @@
+import threading
+
+from mantaray.symbolic_execution.expressions import Variable, Conditional, get_children
+from mantaray.utils import LRUCache
+
+ATOMS_CACHE_SIZE = 65536
+
+_atoms_cache = LRUCache(ATOMS_CACHE_SIZE)
+_atoms_cache_lock = threading.Lock()
+
+
+def get_atoms(s_expression):
+    """ Returns unknowns of the solver the expression refers to: variables, as well as conditionals, which stand for
+    unconstrained constants when none of their options holds
+    """
+    with _atoms_cache_lock:
+        atoms = _atoms_cache.get(s_expression, None)
+
+    if atoms is not None:
+        return atoms
+
+    atoms = set()
+    visited = set()
+    stack = [s_expression]
+
+    while stack:
+        node = stack.pop()
+
+        if node in visited:
+            continue
+
+        visited.add(node)
+
+        if isinstance(node, (Variable, Conditional)):
+            atoms.add(node)
+
+        stack.extend(get_children(node))
+
+    atoms = frozenset(atoms)
+
+    with _atoms_cache_lock:
+        _atoms_cache[s_expression] = atoms
+
+    return atoms
+
+
+class DisjointSets:
+    """ Union-find over hashable items with path halving and union by size
+    """
+    def __init__(self):
+        self._parents = {}
+        self._sizes = {}
+
+    def find(self, item):
+        parent = self._parents.setdefault(item, item)
+
+        while parent is not item:
+            grandparent = self._parents[parent]
+            self._parents[item] = grandparent
+            item, parent = grandparent, self._parents[grandparent]
+
+        return item
+
+    def union(self, item1, item2):
+        root1 = self.find(item1)
+        root2 = self.find(item2)
+
+        if root1 is root2:
+            return root1
+
+        if self._sizes.get(root1, 1) < self._sizes.get(root2, 1):
+            root1, root2 = root2, root1
+
+        self._parents[root2] = root1
+        self._sizes[root1] = self._sizes.get(root1, 1) + self._sizes.get(root2, 1)
+        return root1
+
+
+def get_independent_groups(conjuncts):
+    """ Splits conjuncts into groups which share no unknowns (see `get_atoms`), so the conjunction is satisfiable iff
+    every group is. Conjuncts keep their order within groups, and groups are ordered by their first conjuncts.
+    """
+    sets = DisjointSets()
+
+    for conjunct in conjuncts:
+        sets.find(conjunct)
+
+        for atom in get_atoms(conjunct):
+            sets.union(conjunct, atom)
+
+    groups = {}
+
+    for conjunct in conjuncts:
+        groups.setdefault(sets.find(conjunct), []).append(conjunct)
+
+    return list(groups.values())
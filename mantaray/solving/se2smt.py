@@ -1,15 +1,72 @@
-from z3 import Bool, Real, Int, Not, And, Or, z3
+import itertools
+import weakref
+
+from z3 import Bool, Real, Int, Not, And, Or, If, z3
 
 from mantaray.errors import MantarayError, MantarayNotImplemented
 from mantaray.symbolic_execution.expressions import UnaryOperatorType, BinaryOperatorType
 from mantaray.symbolic_execution.type import SEType
 from mantaray.symbolic_execution.visitor import SEVisitor
+from mantaray.utils import LRUCache
+
+TRANSLATION_CACHE_SIZE = 65536
+
+
+_undefined_ids = itertools.count()
+_undefined_names = weakref.WeakKeyDictionary()
+
+
+def get_undefined_name(conditional):
+    """ Returns the name of unconstrained constant standing for the value of conditional when none of its options
+    holds. Names are unique per conditional during the whole run, so distinct conditionals are never conflated.
+    """
+    name = _undefined_names.get(conditional, None)
+
+    if name is None:
+        name = "__undefined_{0}".format(next(_undefined_ids))
+        _undefined_names[conditional] = name
+
+    return name
 
 
 class SE2SMTConverter(SEVisitor):
-    def __init__(self):
-        self.transform = self.visit
+    """ Converts symbolic expressions into Z3 expressions of the given context (the main one by default).
+    Translations of all visited subexpressions are kept in LRU cache, so the converter is intended to be shared among
+    queries of the context.
+    """
+    def __init__(self, cache_size=TRANSLATION_CACHE_SIZE, ctx=None):
+        self.ctx = ctx
         self.symbols = {}
+        self._symbol_names = {}
+        self._cache = LRUCache(cache_size)
+
+    def transform(self, s_expression):
+        smt_expression = self._cache.get(s_expression, None)
+
+        if smt_expression is None:
+            smt_expression = self.visit(s_expression)
+            self._cache[s_expression] = smt_expression
+
+        return smt_expression
+
+    def get_symbol_name(self, variable):
+        """ Returns the name of Z3 constant for the variable. Variables with the same name from different contexts
+        are given distinct names, so the symbols table maps every name back to exactly one variable.
+        """
+        name = self._symbol_names.get(variable, None)
+
+        if name is None:
+            name = variable.name
+            suffix = 0
+
+            while name in self.symbols:
+                suffix += 1
+                name = "{0}!{1}".format(variable.name, suffix)
+
+            self._symbol_names[variable] = name
+            self.symbols[name] = variable
+
+        return name
 
     def visit_Variable(self, variable):
         ctors_map = {
@@ -23,11 +80,19 @@ class SE2SMTConverter(SEVisitor):
         if ctor is None:
             raise MantarayNotImplemented(variable.se_type)
 
-        self.symbols[variable.name] = variable
-        return ctor(variable.name)
+        return ctor(self.get_symbol_name(variable), self.ctx)
 
     def visit_Conditional(self, conditional):
-        raise MantarayError("Conditional can not be properly transformed into SMTLib entities")
+        if not conditional.options:
+            raise MantarayError("Conditional without options can not be transformed into SMTLib entities")
+
+        values = [self.transform(option.value) for option in conditional.options]
+        smt_expression = z3.Const(get_undefined_name(conditional), values[-1].sort())
+
+        for option, value in zip(reversed(conditional.options), reversed(values)):
+            smt_expression = If(self.transform(option.condition), value, smt_expression)
+
+        return smt_expression
 
     def visit_Literal(self, literal):
         ctors = {
@@ -39,7 +104,7 @@ class SE2SMTConverter(SEVisitor):
         ctor = ctors.get(literal.se_type, None)
 
         if ctor is not None:
-            return ctor(literal.value)
+            return ctor(literal.value, self.ctx)
 
         raise MantarayNotImplemented(literal.se_type)
 
@@ -56,10 +121,14 @@ class SE2SMTConverter(SEVisitor):
 
         return ctor(argument)
 
+    def visit_And(self, conjunction):
+        return And([self.transform(argument) for argument in conjunction.arguments])
+
+    def visit_Or(self, disjunction):
+        return Or([self.transform(argument) for argument in disjunction.arguments])
+
     def visit_BinaryOperator(self, binary_operator):
         ctors_map = {
-            BinaryOperatorType.AND: And,
-            BinaryOperatorType.OR: Or,
             BinaryOperatorType.ADD: lambda arg1, arg2: arg1 + arg2,
             BinaryOperatorType.MINUS: lambda arg1, arg2: arg1 - arg2,
             BinaryOperatorType.MUL: lambda arg1, arg2: arg1 * arg2,
@@ -82,6 +151,8 @@ class SE2SMTConverter(SEVisitor):
         return ctor(argument1, argument2)
 
 
+se2smt_converter = SE2SMTConverter()
+
+
 def se2smt(s_expression):
-    se2smt_converter = SE2SMTConverter()
     return se2smt_converter.transform(s_expression), se2smt_converter.symbols
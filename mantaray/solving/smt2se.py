@@ -3,9 +3,13 @@ import z3
 
 # patch z3api
 from mantaray.errors import MantarayError, MantarayNotImplemented
+from mantaray.solving.se2smt import se2smt_converter
 from mantaray.symbolic_execution.expressions import BinaryOperator, BinaryOperatorType, SE_FALSE, SE_TRUE, \
-    UnaryOperator, UnaryOperatorType, Literal
+    UnaryOperator, UnaryOperatorType, Literal, se_and, se_or
 from mantaray.symbolic_execution.type import SEType
+from mantaray.utils import LRUCache
+
+TRANSLATION_CACHE_SIZE = 65536
 
 z3.is_ite = lambda x: z3.is_app_of(x, z3.Z3_OP_ITE)
 z3.is_function = lambda x: z3.is_app_of(x, z3.Z3_OP_UNINTERPRETED)
@@ -30,12 +34,15 @@ def as_key(n):
 
 
 class SMT2SEConverter:
-    def __init__(self, symbols):
+    """ Converts Z3 expressions into symbolic expressions. Translations of all visited terms are kept in LRU cache,
+    so the converter is intended to be shared among queries.
+    """
+    def __init__(self, symbols, cache_size=TRANSLATION_CACHE_SIZE):
         self.symbols = symbols
-        self._memoization = {}
+        self._cache = LRUCache(cache_size)
         self._convert_funcs = {
-            z3.Z3_OP_AND: lambda args, expr: BinaryOperator.create_from_args(BinaryOperatorType.AND, args),
-            z3.Z3_OP_OR: lambda args, expr: BinaryOperator.create_from_args(BinaryOperatorType.OR, args),
+            z3.Z3_OP_AND: lambda args, expr: se_and(*args),
+            z3.Z3_OP_OR: lambda args, expr: se_or(*args),
             z3.Z3_OP_MUL: lambda args, expr: BinaryOperator.create_from_args(BinaryOperatorType.MUL, args),
             z3.Z3_OP_ADD: lambda args, expr: BinaryOperator.create_from_args(BinaryOperatorType.ADD, args),
             z3.Z3_OP_DIV: lambda args, expr: BinaryOperator(args[0], args[1], BinaryOperatorType.DIV),
@@ -53,24 +60,30 @@ class SMT2SEConverter:
     def transform(self, expr):
         """ Converts a Z3 expression into a symbolic expression tree.
         """
+        memoization = {}
         stack = [expr]
         while len(stack) > 0:
             current = stack.pop()
             key = as_key(current)
-            if key not in self._memoization:
-                self._memoization[key] = None
+            if key not in memoization:
+                cached = self._cache.get(key, None)
+                if cached is not None:
+                    memoization[key] = cached
+                    continue
+                memoization[key] = None
                 stack.append(current)
                 for i in range(current.num_args()):
                     stack.append(current.arg(i))
-            elif self._memoization[key] is None:
-                args = [self._memoization[as_key(current.arg(i))]
+            elif memoization[key] is None:
+                args = [memoization[as_key(current.arg(i))]
                         for i in range(current.num_args())]
                 res = self._single_term(current, args)
-                self._memoization[key] = res
+                memoization[key] = res
+                self._cache[key] = res
             else:
                 # we already visited the node, nothing else to do
                 pass
-        return self._memoization[as_key(expr)]
+        return memoization[as_key(expr)]
 
     def _single_term(self, expr, args):
         decl = z3.Z3_get_app_decl(expr.ctx_ref(), expr.as_ast())
@@ -106,6 +119,9 @@ class SMT2SEConverter:
         raise MantarayNotImplemented(str(expr))
 
 
+smt2se_converter = SMT2SEConverter(se2smt_converter.symbols)
+
+
 def smt2se(smt_expression, symbols):
-    smt2se_converter = SMT2SEConverter(symbols)
+    smt2se_converter.symbols = symbols
     return smt2se_converter.transform(smt_expression)
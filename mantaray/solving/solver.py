@@ -1,18 +1,224 @@
-import z3
+import threading
 
-from mantaray.solving.se2smt import se2smt
-from mantaray.solving.smt2se import smt2se
+from mantaray.solving.counterexamples import CounterexampleCache
+from mantaray.solving.facade import SolverFacade, SolverResult
+from mantaray.solving.independence import get_independent_groups
+from mantaray.symbolic_execution.expressions import Literal, Variable, get_conjuncts, se_and
+from mantaray.utils import LRUCache
+
+GROUP_RESULTS_CACHE_SIZE = 65536
+
+
+result_cache = None
+group_results = LRUCache(GROUP_RESULTS_CACHE_SIZE)
+_group_results_lock = threading.Lock()
+counterexample_cache = CounterexampleCache()
+solver_facade = SolverFacade()
+
+
+def set_result_cache(cache):
+    """ Sets the persistent cache (see `mantaray.solving.cache.ResultCache`) consulted by solver queries
+    """
+    global result_cache
+    result_cache = cache
+
+
+def set_counterexample_cache(cache):
+    """ Sets the cache of models and unsat cores (see `mantaray.solving.counterexamples.CounterexampleCache`) tried
+    before the solver, None disables it
+    """
+    global counterexample_cache
+    counterexample_cache = cache
+
+
+def set_solver_settings(settings):
+    """ Sets limits and tactics (see `mantaray.solving.facade.SolverSettings`) of all following solver queries
+    """
+    global solver_facade
+    solver_facade = SolverFacade(settings)
 
 
 def se_simplify(s_expression):
-    smt_expression_original, symbols = se2smt(s_expression)
-    smt_expression_processed = z3.simplify(smt_expression_original)
-    s_expression_processed = smt2se(smt_expression_processed, symbols)
-    return s_expression_processed
+    if isinstance(s_expression, (Literal, Variable)):
+        return s_expression
+
+    if result_cache is not None:
+        return result_cache.simplify(s_expression, solver_facade.simplify)
+
+    return solver_facade.simplify(s_expression)
+
+
+def se_simplify_all(s_expressions):
+    """ Simplifies expressions in one batch, variables and literals are returned as is
+    """
+    s_expressions = list(s_expressions)
+    indices = [index for index, s_expression in enumerate(s_expressions)
+               if not isinstance(s_expression, (Literal, Variable))]
+
+    if result_cache is not None:
+        simplified = result_cache.simplify_all([s_expressions[index] for index in indices],
+                                               solver_facade.simplify_all)
+    else:
+        simplified = solver_facade.simplify_all([s_expressions[index] for index in indices])
+
+    for index, s_expression in zip(indices, simplified):
+        s_expressions[index] = s_expression
+
+    return s_expressions
+
+
+def check(s_expression):
+    """ Returns satisfiability of the expression (see `mantaray.solving.facade.SolverResult`). Conjuncts of the
+    expression are split into groups which share no variables, and every group is checked on its own, so unrelated
+    constraints do not slow down the query, and results of groups are reused by other queries sharing them.
+    """
+    return _combine_results(map(_check_group, _slice(s_expression)))
+
+
+def check_all(s_expressions):
+    """ Returns satisfiability of every expression. Independent groups of conjuncts of all expressions are checked in
+    one incremental solver.
+    """
+    slices = [_slice(s_expression) for s_expression in s_expressions]
+    results = {}
+
+    for groups in slices:
+        for group in groups:
+            if group not in results:
+                results[group] = _get_group_result(group)
+
+    pending = [group for group, result in results.items() if result is None]
+
+    if pending:
+        if result_cache is not None:
+            pending_results = result_cache.check_all(pending, _solve_all)
+        else:
+            pending_results = _solve_all(pending)
+
+        for group, result in zip(pending, pending_results):
+            results[group] = result
+            _set_group_result(group, result)
+
+    return [_combine_results(results[group] for group in groups) for groups in slices]
 
 
 def is_sat(s_expression):
-    solver = z3.Solver()
-    smt_expression, symbols = se2smt(s_expression)
-    solver.add(smt_expression)
-    return solver.check() == z3.sat
+    """ Checks whether the expression may be satisfiable, unknown results are treated conservatively
+    """
+    return check(s_expression).maybe_sat
+
+
+def _slice(s_expression):
+    """ Returns independent groups of conjuncts of the expression as conjunctions
+    """
+    conjuncts = get_conjuncts(s_expression)
+
+    if len(conjuncts) == 1:
+        return [s_expression]
+
+    groups = get_independent_groups(conjuncts)
+
+    if len(groups) == 1:
+        return [s_expression]
+
+    return [se_and(*group) for group in groups]
+
+
+def _check_group(s_expression):
+    result = _get_group_result(s_expression)
+
+    if result is None:
+        if result_cache is not None:
+            result = result_cache.check(s_expression, _solve)
+        else:
+            result = _solve(s_expression)
+
+        _set_group_result(s_expression, result)
+
+    return result
+
+
+def _get_group_result(s_expression):
+    # Results are shared by threads, and lookups reorder the cache
+    with _group_results_lock:
+        return group_results.get(s_expression, None)
+
+
+def _set_group_result(s_expression, result):
+    # Unknown results depend on solver limits
+    if result is not SolverResult.UNKNOWN:
+        with _group_results_lock:
+            group_results[s_expression] = result
+
+
+def _combine_results(results):
+    """ Returns satisfiability of the conjunction of independent groups given their results, stops at the first
+    unsatisfiable group
+    """
+    combined = SolverResult.SAT
+
+    for result in results:
+        if result is SolverResult.UNSAT:
+            return result
+
+        if result is SolverResult.UNKNOWN:
+            combined = result
+
+    return combined
+
+
+def _solve(s_expression):
+    if counterexample_cache is not None:
+        return counterexample_cache.check(s_expression, solver_facade.solve)
+
+    return solver_facade.check(s_expression)
+
+
+def _solve_all(s_expressions):
+    if counterexample_cache is not None:
+        return counterexample_cache.check_all(s_expressions, solver_facade.solve_all)
+
+    return solver_facade.check_all(s_expressions)
+
+
+class SolverSession:
+    """ Incremental solver, which assertion frames follow the stack of symbolic contexts. Checks are answered by the
+    counterexample cache when possible. The core of unsatisfiable path is the whole path condition, since tracking
+    assertions by assumption literals slows down every check of the session.
+    """
+    def __init__(self):
+        self._facade = solver_facade
+        self._counterexample_cache = counterexample_cache
+        self._solver = self._facade.create_solver()
+        self._conjuncts = []
+        self._frames = []
+
+    def push(self):
+        self._solver.push()
+        self._frames.append(len(self._conjuncts))
+
+    def pop(self):
+        self._solver.pop()
+        del self._conjuncts[self._frames.pop():]
+
+    def add(self, s_expression):
+        self._solver.add(self._facade.translate(s_expression))
+        self._conjuncts.extend(get_conjuncts(s_expression))
+
+    def check(self):
+        cache = self._counterexample_cache
+
+        if cache is None:
+            return self._facade.get_result(self._solver)
+
+        result = cache.decide(self._conjuncts)
+
+        if result is None:
+            result = self._facade.get_result(self._solver)
+            model = self._facade.get_model(self._solver.model()) if result is SolverResult.SAT else None
+            cache.add(result, model, self._conjuncts)
+
+        return result
+
+    def is_sat(self):
+        return self.check().maybe_sat
@@ -1,19 +1,34 @@
-import copy
+from mantaray.symbolic_execution.expressions import SE_FALSE, se_conditional, merge_options, get_conjuncts
+from mantaray.symbolic_execution.visitor import SETransformer
 
-from mantaray.symbolic_execution.expressions import Conditional
-from mantaray.symbolic_execution.visitor import SEVisitor
 
-
-class Conditionalizer(SEVisitor):
-    """ Replaces all variables in given expression with their conditionals
+class Conditionalizer(SETransformer):
+    """ Replaces all variables in given expression with their conditionals. Options of variables are immutable
+    snapshots, so a conditional built for a snapshot is reused until the variable is updated.
     """
-    def __init__(self, variables_options):
-        self.conditionalize = self.visit
-        self.variables_options = variables_options
+    def __init__(self, context):
+        self.conditionalize = self.transform
+        self.context = context
+        self._conditionals = {}
 
     def visit_Variable(self, variable):
-        if variable in self.variables_options:
-            if self.variables_options[variable]:
-                return Conditional(variable.se_type, copy.deepcopy(self.variables_options[variable]))
-            return variable
+        variable_options = self.context.variables_options.get(variable, None)
+        if variable_options:
+            if self.context.is_reachable and self.context.condition is not SE_FALSE:
+                # Option whose condition is syntactically implied by the path condition is the only feasible one.
+                # Paths cut off by returns have false conditions, which would imply options written after returns.
+                path_conjuncts = set(get_conjuncts(self.context.condition))
+
+                for option in variable_options:
+                    if option.condition is not SE_FALSE and path_conjuncts.issuperset(get_conjuncts(option.condition)):
+                        return option.value
+
+            snapshot_options, conditional = self._conditionals.get(variable, (None, None))
+
+            if snapshot_options is not variable_options:
+                # Options of a variable are disjoint, so ones with equal values can be merged
+                conditional = se_conditional(variable.se_type, merge_options(variable_options))
+                self._conditionals[variable] = variable_options, conditional
+
+            return conditional
         return variable
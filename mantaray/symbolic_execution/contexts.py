@@ -1,55 +1,69 @@
-import copy
-import logging
+import functools
 import uuid
 from abc import ABC
 
 from mantaray.symbolic_execution.conditionalizer import Conditionalizer
 from mantaray.errors import MantarayError
-from mantaray.symbolic_execution.expressions import Variable, SE_TRUE, Option, se_and, se_not
-from mantaray.utils import get_random_id
-
-logger = logging.getLogger("context")
+from mantaray.solving.solver import is_sat
+from mantaray.symbolic_execution.expressions import Variable, Or, SE_TRUE, SE_FALSE, Option, se_and, se_not, \
+    merge_options
+from mantaray.tracing import tracer, TraceLevel
+from mantaray.utils import get_random_id, PersistentMap
 
 
 class SymbolicContext(ABC):
     """ Abstract base for all symbolic interpretation contexts
+
+    Variables state is kept in persistent maps of immutable option tuples, so a nested context shares the state of
+    its outer context and copies only the variables it updates. Alongside them, the abstract domain state
+    approximates free variables on the path leading to the context.
     """
     def __init__(self, outer_context):
         self.outer_context = outer_context
         self.id = uuid.uuid4().hex
         self.updated_variables = set()
+        self.adjuncted_conditions = []
 
         if outer_context is not None:
             self.condition = outer_context.condition
-            self.variables_refs = copy.deepcopy(outer_context.variables_refs)
-            self.variables_options = copy.deepcopy(outer_context.variables_options)
+            self.variables_refs = outer_context.variables_refs
+            self.variables_options = outer_context.variables_options
             self.is_reachable = outer_context.is_reachable
+            self.domain = outer_context.domain
+            self.abstract_state = outer_context.abstract_state
+            self.feasible_conditions = outer_context.feasible_conditions
         else:
             self.condition = SE_TRUE
-            self.variables_refs = {}
-            self.variables_options = {}
+            self.variables_refs = PersistentMap()
+            self.variables_options = PersistentMap()
             self.is_reachable = True
+            self.feasible_conditions = set()
 
-        self.conditionalizer = Conditionalizer(self.variables_options)
+        self.conditionalizer = Conditionalizer(self)
 
     def leave(self):
         """ Context leaving handler
         """
-        for name, variable in self.outer_context.variables_refs.items():
-            self.outer_context.variables_options[variable] = self.variables_options[variable]
+        outer_context = self.outer_context
 
-            if variable in self.updated_variables:
-                self.outer_context.updated_variables.add(variable)
+        for variable in self.updated_variables:
+            if variable in outer_context.variables_options:
+                outer_context.variables_options = \
+                    outer_context.variables_options.set(variable, self.variables_options[variable])
+                outer_context.updated_variables.add(variable)
 
-        return self.outer_context
+        return outer_context
 
     def create_variable(self, name, se_type):
         """ Creates and registers new variable 
         """
         variable = Variable(self.id, name, se_type)
-        self.variables_refs[name] = variable
-        self.variables_options[variable] = []
-        logger.info("Variable `{0} {1}` created".format(se_type, name))
+        self.variables_refs = self.variables_refs.set(name, variable)
+        self.variables_options = self.variables_options.set(variable, ())
+
+        if tracer.is_enabled(TraceLevel.INFO):
+            tracer.emit(TraceLevel.INFO, "context", "variable_created", "Variable `{se_type} {name}` created",
+                        se_type=se_type, name=name)
 
         return variable
 
@@ -66,31 +80,43 @@ class SymbolicContext(ABC):
     def update_variable(self, variable, value):
         """ Updates a scope of the variable for a new option
         """
-        variable_options = self.variables_options[variable]
+        variable_options = []
+        not_condition = se_not(self.condition)
 
-        for option in variable_options:
-            if option.condition == self.condition:
-                variable_options.remove(option)
-            else:
-                option.adjunct_condition(se_not(self.condition))
+        for option in self.variables_options[variable]:
+            if option.condition != self.condition:
+                variable_options.append(option.restrict(not_condition))
 
         option = Option(self.condition, value)
         variable_options.append(option)
+        self.variables_options = self.variables_options.set(variable, tuple(variable_options))
         self.updated_variables.add(variable)
-        logger.info("Value of the `{0}` variable updated for option `{1}`".format(variable, option))
+
+        if tracer.is_enabled(TraceLevel.INFO):
+            tracer.emit(TraceLevel.INFO, "context", "variable_updated",
+                        "Value of the `{variable}` variable updated for option `{option}`",
+                        variable=variable, option=option)
 
     def conditionalize(self, symbolic_expression):
         return self.conditionalizer.conditionalize(symbolic_expression)
 
     def adjunct_condition(self, additional_condition, propagate=True):
         self.condition = se_and(self.condition, additional_condition)
+        self.adjuncted_conditions.append(additional_condition)
+
+        if self.condition is SE_FALSE:
+            # All paths through the context have returned, e.g. in a nested block
+            self.is_reachable = False
+
         if propagate:
             self.outer_context.adjunct_condition(additional_condition)
 
 
 class GlobalContext(SymbolicContext):
-    def __init__(self):
+    def __init__(self, domain):
         super().__init__(None)
+        self.domain = domain
+        self.abstract_state = domain.top()
 
     def adjunct_condition(self, *args):
         pass
@@ -123,6 +149,10 @@ class FunctionContext(LocalContext):
         for parameter, argument in zip(parameters, arguments):
             self.update_variable(parameter, argument)
 
+        # Conditions found feasible are remembered while the body is interpreted, since options are passed out of
+        # nested statements unchanged. Conditions of other functions refer to other variables.
+        self.feasible_conditions = {self.condition}
+
     def adjunct_condition(self, additional_condition, propagate=False):
         super().adjunct_condition(additional_condition, False)
 
@@ -133,38 +163,53 @@ class StatementBlockContext(LocalContext):
 
 
 class ConditionalStatementContext(LocalContext):
+    """ Context of conditional statement. Conditions of its branches are disjoint, so the branches are interpreted
+    one after another: the false branch starts from the state updated by the true one.
+    """
     def __init__(self, outer_context, statement_condition):
         super().__init__(outer_context)
         self.statement_condition = statement_condition
         self.if_true_context = BranchContext(self, statement_condition)
-        self.if_false_context = BranchContext(self, se_not(statement_condition))
+        self._if_false_context = None
+
+    @property
+    def if_false_context(self):
+        if self._if_false_context is None:
+            self._if_false_context = BranchContext(self, se_not(self.statement_condition))
+
+        return self._if_false_context
 
     def leave(self):
-        rewritten_variables = \
-            self.if_true_context.updated_variables.intersection(self.if_false_context.updated_variables)
+        """ Joins options of variables updated by branches: options with equal values are merged, and options which
+        appeared in branches are dropped if their conditions are unsatisfiable. Only conditions changed by the
+        branches are checked, e.g. ones restricted by negated conditions of branches, while conditions of options
+        which were passed into the statement or set on entered paths are known to be feasible.
+        """
+        initial_variables_options = self.outer_context.variables_options
 
-        for variable in rewritten_variables:
-            for option in self.variables_options[variable]:
-                self.if_true_context.variables_options[variable].remove(option)
-                self.if_false_context.variables_options[variable].remove(option)
-                self.variables_options[variable].clear()
+        for variable in self.updated_variables:
+            initial_options = set(initial_variables_options.get(variable, ()))
+            variable_options = tuple(option for option in merge_options(self.variables_options[variable])
+                                     if option in initial_options or self._is_feasible(option.condition))
+            self.variables_options = self.variables_options.set(variable, variable_options)
 
-        updated_variables = self.if_true_context.updated_variables.union(self.if_false_context.updated_variables)
+        return super().leave()
 
-        for name, variable in self.variables_refs.items():
-            self.variables_options[variable].extend(self.if_true_context.variables_options[variable] +
-                                                    self.if_false_context.variables_options[variable])
+    def _is_feasible(self, condition):
+        disjuncts = condition.arguments if isinstance(condition, Or) else (condition,)
 
-            if variable in updated_variables:
-                self.updated_variables.add(variable)
+        if any(disjunct in self.feasible_conditions for disjunct in disjuncts):
+            return True
 
-        return super().leave()
+        if not self.domain.is_feasible(self.domain.top(), condition, functools.partial(is_sat, condition)):
+            return False
+
+        self.feasible_conditions.add(condition)
+        return True
 
 
 class BranchContext(LocalContext):
     def __init__(self, outer_context, statement_condition):
         super().__init__(outer_context)
+        self.statement_condition = statement_condition
         self.condition = se_and(self.condition, statement_condition)
-
-    def leave(self):
-        return self.outer_context
@@ -0,0 +1,454 @@
+import math
+from abc import ABC, abstractmethod
+
+from mantaray.symbolic_execution.expressions import Variable, Literal, Conditional, BinaryOperator, UnaryOperator, \
+    BinaryOperatorType, UnaryOperatorType, And, Or, get_children
+from mantaray.symbolic_execution.type import SEType
+from mantaray.utils import PersistentMap
+
+INFINITY = math.inf
+
+
+class AbstractDomain(ABC):
+    """ Abstract base for domains approximating values of free variables on the current path. Domains answer
+    feasibility questions they can decide cheaply, so the solver is called only for the remaining ones.
+
+    A domain state over-approximates the states satisfying the path condition. The None state stands for the empty
+    set, i.e. for an infeasible path.
+    """
+    def __init__(self):
+        self.queries = 0
+        self.decided = 0
+
+    @abstractmethod
+    def top(self):
+        """ Returns the state which does not constrain any variable
+        """
+        pass
+
+    @abstractmethod
+    def decide(self, state, condition):
+        """ Returns True or False if the condition has this value in every concrete state approximated by the state,
+        and None if the domain can not decide it
+        """
+        pass
+
+    @abstractmethod
+    def assume(self, state, condition):
+        """ Returns the state refined by the condition, or None if the condition can not hold in the state
+        """
+        pass
+
+    def is_feasible(self, state, condition, solve):
+        """ Returns whether the condition is satisfiable on the feasible path approximated by the state. Calls
+        `solve` only when the domain can not decide it.
+        """
+        self.queries += 1
+
+        if state is None:
+            decision = False
+        else:
+            decision = self.decide(state, condition)
+
+            if decision is None and self.assume(state, condition) is None:
+                decision = False
+
+        if decision is None:
+            return solve()
+
+        self.decided += 1
+        return decision
+
+    def statistics(self):
+        return {
+            "queries": self.queries,
+            "decided": self.decided,
+            "hit_rate": self.decided / self.queries if self.queries else 0.0,
+        }
+
+
+class Interval:
+    """ Closed interval of numbers, which bounds may be infinite. Boolean values are represented by intervals within
+    [0, 1].
+    """
+    __slots__ = ("low", "high")
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def __str__(self):
+        return "[{0}, {1}]".format(self.low, self.high)
+
+    def __eq__(self, other):
+        return isinstance(other, Interval) and self.low == other.low and self.high == other.high
+
+    def __ne__(self, other):
+        return not(self == other)
+
+    def __hash__(self):
+        return hash((self.low, self.high))
+
+    def is_empty(self):
+        return self.low > self.high
+
+    def join(self, other):
+        return Interval(min(self.low, other.low), max(self.high, other.high))
+
+    def meet(self, other):
+        return Interval(max(self.low, other.low), min(self.high, other.high))
+
+
+TOP = Interval(-INFINITY, INFINITY)
+TRUE = Interval(1, 1)
+FALSE = Interval(0, 0)
+UNKNOWN = Interval(0, 1)
+
+
+def get_truth(interval):
+    """ Returns the boolean value represented by the interval, or None if it is unknown
+    """
+    if interval == TRUE:
+        return True
+
+    if interval == FALSE:
+        return False
+
+    return None
+
+
+def _from_truth(truth):
+    if truth is None:
+        return UNKNOWN
+
+    return TRUE if truth else FALSE
+
+
+def _multiply(value1, value2):
+    # Zero bound stays zero even if the other one is infinite
+    if value1 == 0 or value2 == 0:
+        return 0
+
+    return value1 * value2
+
+
+def _floor(value):
+    return math.floor(value) if math.isfinite(value) else value
+
+
+def _ceil(value):
+    return math.ceil(value) if math.isfinite(value) else value
+
+
+def _add(interval1, interval2):
+    return Interval(interval1.low + interval2.low, interval1.high + interval2.high)
+
+
+def _subtract(interval1, interval2):
+    return Interval(interval1.low - interval2.high, interval1.high - interval2.low)
+
+
+def _mul(interval1, interval2):
+    products = [_multiply(bound1, bound2) for bound1 in (interval1.low, interval1.high)
+                for bound2 in (interval2.low, interval2.high)]
+    return Interval(min(products), max(products))
+
+
+def _divide(interval1, interval2):
+    if interval2.low <= 0 <= interval2.high:
+        return TOP
+
+    try:
+        quotients = [bound1 / bound2 for bound1 in (interval1.low, interval1.high)
+                     for bound2 in (interval2.low, interval2.high)]
+    except OverflowError:
+        return TOP
+
+    if any(math.isnan(quotient) for quotient in quotients):
+        return TOP
+
+    # Widened to integers, so the result holds for both integer and real division
+    return Interval(_floor(min(quotients)), _ceil(max(quotients)))
+
+
+def _compare_greater(interval1, interval2, strict):
+    if interval1.low > interval2.high or not strict and interval1.low >= interval2.high:
+        return TRUE
+
+    if interval1.high < interval2.low or strict and interval1.high <= interval2.low:
+        return FALSE
+
+    return UNKNOWN
+
+
+def _compare_equal(interval1, interval2):
+    if interval1.low == interval1.high == interval2.low == interval2.high:
+        return TRUE
+
+    if interval1.high < interval2.low or interval2.high < interval1.low:
+        return FALSE
+
+    return UNKNOWN
+
+
+def _and(*intervals):
+    if FALSE in intervals:
+        return FALSE
+
+    if all(interval == TRUE for interval in intervals):
+        return TRUE
+
+    return UNKNOWN
+
+
+def _or(*intervals):
+    if TRUE in intervals:
+        return TRUE
+
+    if all(interval == FALSE for interval in intervals):
+        return FALSE
+
+    return UNKNOWN
+
+
+def _not(interval):
+    return _from_truth(None if get_truth(interval) is None else not get_truth(interval))
+
+
+_binary_transfers = {
+    BinaryOperatorType.ADD: _add,
+    BinaryOperatorType.MINUS: _subtract,
+    BinaryOperatorType.MUL: _mul,
+    BinaryOperatorType.DIV: _divide,
+    BinaryOperatorType.EQ: _compare_equal,
+    BinaryOperatorType.NE: lambda interval1, interval2: _not(_compare_equal(interval1, interval2)),
+    BinaryOperatorType.GT: lambda interval1, interval2: _compare_greater(interval1, interval2, True),
+    BinaryOperatorType.GE: lambda interval1, interval2: _compare_greater(interval1, interval2, False),
+    BinaryOperatorType.LT: lambda interval1, interval2: _compare_greater(interval2, interval1, True),
+    BinaryOperatorType.LE: lambda interval1, interval2: _compare_greater(interval2, interval1, False),
+}
+
+_negated_comparisons = {
+    BinaryOperatorType.EQ: BinaryOperatorType.NE,
+    BinaryOperatorType.NE: BinaryOperatorType.EQ,
+    BinaryOperatorType.GT: BinaryOperatorType.LE,
+    BinaryOperatorType.GE: BinaryOperatorType.LT,
+    BinaryOperatorType.LT: BinaryOperatorType.GE,
+    BinaryOperatorType.LE: BinaryOperatorType.GT,
+}
+
+_swapped_comparisons = {
+    BinaryOperatorType.EQ: BinaryOperatorType.EQ,
+    BinaryOperatorType.NE: BinaryOperatorType.NE,
+    BinaryOperatorType.GT: BinaryOperatorType.LT,
+    BinaryOperatorType.GE: BinaryOperatorType.LE,
+    BinaryOperatorType.LT: BinaryOperatorType.GT,
+    BinaryOperatorType.LE: BinaryOperatorType.GE,
+}
+
+
+def _get_default_interval(se_type):
+    return UNKNOWN if se_type is SEType.BOOL else TOP
+
+
+class IntervalDomain(AbstractDomain):
+    """ Domain of intervals of `INT`, `FLOAT` and `BOOL` variables, which also propagates constants. States are
+    persistent maps from free variables to their intervals, refined by comparisons of variables with expressions.
+    """
+    def top(self):
+        return PersistentMap()
+
+    def decide(self, state, condition):
+        return get_truth(self.evaluate(state, condition))
+
+    def evaluate(self, state, s_expression):
+        """ Returns the interval containing every value of the expression in the state
+        """
+        intervals = {}
+        stack = [(s_expression, False)]
+
+        while stack:
+            node, children_evaluated = stack.pop()
+
+            if node in intervals:
+                continue
+
+            if not children_evaluated:
+                stack.append((node, True))
+                stack.extend((child, False) for child in get_children(node))
+                continue
+
+            intervals[node] = self._evaluate_node(state, node, intervals)
+
+        return intervals[s_expression]
+
+    def assume(self, state, condition):
+        if state is None:
+            return None
+
+        pending = [(condition, True)]
+
+        while pending:
+            node, positive = pending.pop()
+
+            if isinstance(node, UnaryOperator) and node.op_type is UnaryOperatorType.NOT:
+                pending.append((node.argument, not positive))
+                continue
+
+            if isinstance(node, And if positive else Or):
+                pending.extend((argument, positive) for argument in node.arguments)
+                continue
+
+            if isinstance(node, BinaryOperator):
+                bop_type = node.bop_type if positive else _negated_comparisons.get(node.bop_type, None)
+
+                if bop_type in _swapped_comparisons:
+                    state = self._refine(state, node.argument1, node.argument2, bop_type)
+
+                    if state is not None:
+                        state = self._refine(state, node.argument2, node.argument1, _swapped_comparisons[bop_type])
+            else:
+                variable = self._get_variable(state, node)
+
+                if variable is not None and variable.se_type is SEType.BOOL:
+                    state = self._restrict(state, variable, TRUE if positive else FALSE)
+
+            if state is None:
+                return None
+
+        # The final state is the most refined one, so a single check covers every asserted node
+        if self.decide(state, condition) is False:
+            return None
+
+        return state
+
+    def _evaluate_node(self, state, node, intervals):
+        if isinstance(node, Variable):
+            return state.get(node, None) or _get_default_interval(node.se_type)
+
+        if isinstance(node, Literal):
+            if node.se_type is SEType.BOOL:
+                return _from_truth(node.value)
+
+            if node.se_type in (SEType.INT, SEType.FLOAT):
+                return Interval(node.value, node.value)
+
+            return TOP
+
+        if isinstance(node, BinaryOperator):
+            transfer = _binary_transfers.get(node.bop_type, None)
+
+            if transfer is None:
+                return TOP
+
+            return transfer(intervals[node.argument1], intervals[node.argument2])
+
+        if isinstance(node, And):
+            return _and(*[intervals[argument] for argument in node.arguments])
+
+        if isinstance(node, Or):
+            return _or(*[intervals[argument] for argument in node.arguments])
+
+        if isinstance(node, UnaryOperator):
+            return _not(intervals[node.argument]) if node.op_type is UnaryOperatorType.NOT else TOP
+
+        if isinstance(node, Conditional):
+            return self._evaluate_conditional(node, intervals)
+
+        return TOP
+
+    @staticmethod
+    def _evaluate_conditional(conditional, intervals):
+        # Value of the first holding option is taken, or an arbitrary one if none holds
+        interval = None
+        possible_conditions = set()
+
+        for option in conditional.options:
+            truth = get_truth(intervals[option.condition])
+
+            if truth is False:
+                continue
+
+            value = intervals[option.value]
+            interval = value if interval is None else interval.join(value)
+
+            if truth is True:
+                return interval
+
+            possible_conditions.add(option.condition)
+
+        if interval is not None and _are_exhaustive(possible_conditions):
+            return interval
+
+        default_interval = _get_default_interval(conditional.se_type)
+        return default_interval if interval is None else interval.join(default_interval)
+
+    def _get_variable(self, state, node):
+        """ Returns the free variable the node evaluates to in the state, if any
+        """
+        if isinstance(node, Variable):
+            return node
+
+        if isinstance(node, Conditional):
+            for option in node.options:
+                truth = self.decide(state, option.condition)
+
+                if truth is False:
+                    continue
+
+                if truth is True and isinstance(option.value, Variable):
+                    return option.value
+
+                break
+
+        return None
+
+    def _refine(self, state, argument, bound, bop_type):
+        """ Refines the interval of the variable `argument` evaluates to by the comparison with `bound`
+        """
+        variable = self._get_variable(state, argument)
+
+        if variable is None or variable.se_type not in (SEType.INT, SEType.FLOAT):
+            return state
+
+        interval = self.evaluate(state, bound)
+        integral = variable.se_type is SEType.INT
+
+        if bop_type is BinaryOperatorType.EQ:
+            refinement = Interval(_ceil(interval.low), _floor(interval.high)) if integral else interval
+        elif bop_type is BinaryOperatorType.GT:
+            refinement = Interval(_floor(interval.low) + 1 if integral else interval.low, INFINITY)
+        elif bop_type is BinaryOperatorType.GE:
+            refinement = Interval(_ceil(interval.low) if integral else interval.low, INFINITY)
+        elif bop_type is BinaryOperatorType.LT:
+            refinement = Interval(-INFINITY, _ceil(interval.high) - 1 if integral else interval.high)
+        elif bop_type is BinaryOperatorType.LE:
+            refinement = Interval(-INFINITY, _floor(interval.high) if integral else interval.high)
+        else:
+            return state
+
+        return self._restrict(state, variable, refinement)
+
+    @staticmethod
+    def _restrict(state, variable, refinement):
+        interval = state.get(variable, None) or _get_default_interval(variable.se_type)
+        restricted = interval.meet(refinement)
+
+        if restricted.is_empty():
+            return None
+
+        if restricted == interval:
+            return state
+
+        return state.set(variable, restricted)
+
+
+def _are_exhaustive(conditions):
+    """ Checks whether conditions contain some condition along with its negation
+    """
+    for condition in conditions:
+        if isinstance(condition, UnaryOperator) and condition.op_type is UnaryOperatorType.NOT and \
+                condition.argument in conditions:
+            return True
+
+    return False
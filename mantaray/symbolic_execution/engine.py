@@ -1,21 +1,33 @@
-import logging
-
 from mantaray.errors import MantarayError
+from mantaray.solving.solver import SolverSession
 from mantaray.symbolic_execution.contexts import GlobalContext, FunctionContext, StatementBlockContext, \
     ConditionalStatementContext, BranchContext
-from mantaray.symbolic_execution.expressions import Literal, BinaryOperator, UnaryOperator
-
-logger = logging.getLogger("symbolic_vm")
+from mantaray.symbolic_execution.domains import IntervalDomain
+from mantaray.symbolic_execution.expressions import Literal, se_binary, se_unary
 
 
 class SEEngine:
-    def __init__(self, deepness):
+    def __init__(self, deepness, domain=None):
         self.deepness = deepness
-        self.current_context = GlobalContext()
+        self.domain = domain if domain is not None else IntervalDomain()
+        self.current_context = GlobalContext(self.domain)
+        self.solver_session = SolverSession()
+        self.truncated_loops_count = 0
+        self._adjuncted_marks = []
+
+    def spawn(self):
+        """ Returns a new engine with the same settings and abstract domain
+        """
+        return SEEngine(self.deepness, self.domain)
 
     def conditionalize(self, symbolic_expression):
         return self.current_context.conditionalize(symbolic_expression)
 
+    def get_parameters(self, descriptor):
+        """ Returns variables of parameters of the function being interpreted
+        """
+        return [self.get_variable_ref(name) for name in descriptor.parameters]
+
     def try_enter_function(self, descriptor, arguments):
         arguments = map(lambda argument: self.conditionalize(argument), arguments)
         return self._try_enter_context(FunctionContext(self.current_context, descriptor, arguments))
@@ -49,11 +61,11 @@ class SEEngine:
     def process_binary_operator(self, argument1, argument2, bop_type):
         argument1 = self.conditionalize(argument1)
         argument2 = self.conditionalize(argument2)
-        return BinaryOperator(argument1, argument2, bop_type)
+        return se_binary(argument1, argument2, bop_type)
 
     def process_unary_operator(self, argument, op_type):
         argument = self.conditionalize(argument)
-        return UnaryOperator(argument, op_type)
+        return se_unary(argument, op_type)
 
     def try_enter_statement_block(self):
         return self._try_enter_context(StatementBlockContext(self.current_context))
@@ -66,23 +78,102 @@ class SEEngine:
         return self._try_enter_context(ConditionalStatementContext(self.current_context, condition))
 
     def leave_conditional_statement(self):
-        self._leave_current_context(ConditionalStatementContext)
+        if self._leave_current_context(ConditionalStatementContext):
+            if self.current_context.abstract_state is None or not self.solver_session.is_sat():
+                # Every branch of the statement has returned
+                self.current_context.is_reachable = False
+
+    def try_enter_loop_iteration(self, condition):
+        """ Enters an iteration of unrolled loop, i.e. the true branch of conditional statement on the loop condition
+        """
+        if not self.try_enter_conditional_statement(condition):
+            return False
+
+        if self.try_enter_branch(self.current_context.if_true_context):
+            return True
+
+        self.leave_conditional_statement()
+        return False
+
+    def leave_loop_iteration(self):
+        self.leave_branch()
+        self.leave_conditional_statement()
+
+    def is_feasible(self, condition):
+        """ Checks whether the condition is satisfiable on the current path
+        """
+        condition = self.conditionalize(condition)
+        self.solver_session.push()
+        self.solver_session.add(condition)
+        feasible = self.domain.is_feasible(self.current_context.abstract_state, condition, self.solver_session.is_sat)
+        self.solver_session.pop()
+        return feasible
+
+    def get_path_values(self):
+        """ Returns values of variables updated in the current context on its path, or None if some of them depend on
+        conditions within the context
+        """
+        context = self.current_context
+        values = {}
+
+        for variable in context.updated_variables:
+            value = next((option.value for option in context.variables_options[variable]
+                          if option.condition is context.condition), None)
+
+            if value is None:
+                return None
+
+            values[variable] = value
+
+        return values
 
     def try_enter_branch(self, branching_context):
-        return self._try_enter_context(branching_context)
+        return self._try_enter_context(branching_context, branching_context.statement_condition)
 
     def leave_branch(self):
         self._leave_current_context(BranchContext)
 
-    def _try_enter_context(self, context):
-        if context.is_reachable:
-            self.current_context = context
-            return True
+    def _try_enter_context(self, context, condition=None):
+        """ Enters the context within a new solver frame, which asserts the given condition. Contexts which are
+        infeasible under the current path condition are marked unreachable and not entered. Feasibility is decided
+        by the abstract domain when possible, and by the solver otherwise.
+        """
+        if not context.is_reachable:
+            return False
 
-        return False
+        self.solver_session.push()
+
+        if condition is not None:
+            self.solver_session.add(condition)
+
+            if not self.domain.is_feasible(context.abstract_state, condition, self.solver_session.is_sat):
+                self.solver_session.pop()
+                context.is_reachable = False
+                return False
+
+            context.abstract_state = self.domain.assume(context.abstract_state, condition)
+
+        # Options set on the entered path need no feasibility checks when statements are joined
+        context.feasible_conditions.add(context.condition)
+        self._adjuncted_marks.append(len(self.current_context.adjuncted_conditions))
+        self.current_context = context
+        return True
 
     def _leave_current_context(self, context_type):
+        """ Leaves the current context along with its solver frame. Conditions adjuncted to the outer context
+        meanwhile (e.g. by return statements) are asserted in its frame and refine its abstract state. Returns whether
+        there were any.
+        """
         if not isinstance(self.current_context, context_type):
             raise MantarayError("Inconsistent context: {0}".format(self.current_context))
 
         self.current_context = self.current_context.leave()
+        self.solver_session.pop()
+
+        adjuncted_conditions = self.current_context.adjuncted_conditions[self._adjuncted_marks.pop():]
+
+        for condition in adjuncted_conditions:
+            self.solver_session.add(condition)
+            self.current_context.abstract_state = self.domain.assume(self.current_context.abstract_state, condition)
+
+        return bool(adjuncted_conditions)
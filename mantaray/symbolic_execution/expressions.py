@@ -1,43 +1,83 @@
-import uuid
+import collections.abc
+import threading
+import weakref
 from abc import ABC, abstractmethod
 from enum import Enum
 
-import collections
-
 from mantaray.errors import MantarayError, MantarayNotImplemented
 from mantaray.symbolic_execution.type import SEType
 
 
 class Option:
-    """ Class to represent conditional symbolic values
+    """ Class to represent conditional symbolic values. Options are immutable, so they can be shared among contexts.
     """
+    __slots__ = ("condition", "value")
+
     def __init__(self, condition, value):
         self.condition = condition
         self.value = value
-        self.id = self.id = uuid.uuid4().hex
 
     def __str__(self):
         return "{0} -> {1}".format(self.condition, self.value)
 
-    def adjunct_condition(self, condition):
-        self.condition = se_and(self.condition, condition)
+    def restrict(self, condition):
+        """ Returns the option restricted by additional condition
+        """
+        return Option(se_and(self.condition, condition), self.value)
 
     def __hash__(self):
-        return hash(self.id)
+        return hash((self.condition, self.value))
 
     def __eq__(self, other):
         if not isinstance(other, self.__class__):
             return False
 
-        return self.id == other.id
+        return self.condition is other.condition and self.value is other.value
 
     def __ne__(self, other):
         return not(self == other)
 
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
 
 class SymbolicExpression(ABC):
     """ Abstract base class for all symbolic expressions
+
+    Expressions are immutable and hash-consed: constructing an expression structurally equal to an existing one
+    returns the existing object. Thus equality is an identity check and hashes are computed only once.
     """
+    __slots__ = ("_hash", "__weakref__")
+
+    _interned = weakref.WeakValueDictionary()
+    _interning_lock = threading.Lock()
+
+    @classmethod
+    def _intern(cls, components, attributes=()):
+        """ Returns the unique instance of the class with given equality components, creating it if necessary.
+        Attributes, which do not take part in equality, are initialized by the construction creating the instance.
+        """
+        key = (cls, components)
+        expression = SymbolicExpression._interned.get(key, None)
+
+        if expression is None:
+            with SymbolicExpression._interning_lock:
+                expression = SymbolicExpression._interned.get(key, None)
+
+                if expression is None:
+                    expression = object.__new__(cls)
+                    expression._initialize(*components, *attributes)
+                    expression._hash = hash(key)
+                    SymbolicExpression._interned[key] = expression
+
+        return expression
+
+    @abstractmethod
+    def _initialize(self, *arguments):
+        pass
 
     @abstractmethod
     def equality_components(self):
@@ -52,22 +92,31 @@ class SymbolicExpression(ABC):
         pass
 
     def __hash__(self):
-        return hash(self.equality_components())
+        return self._hash
 
     def __eq__(self, other):
-        if not isinstance(other, self.__class__):
-            return False
-
-        self_equality_components = self.equality_components()
-        other_equality_components = other.equality_components()
-        return self_equality_components == other_equality_components
+        return self is other
 
     def __ne__(self, other):
-        return not(self == other)
+        return self is not other
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return self.__class__, self.equality_components()
 
 
 class Variable(SymbolicExpression):
-    def __init__(self, context_id, name, se_type):
+    __slots__ = ("context_id", "name", "se_type")
+
+    def __new__(cls, context_id, name, se_type):
+        return cls._intern((context_id, name, se_type))
+
+    def _initialize(self, context_id, name, se_type):
         self.context_id = context_id
         self.name = name
         self.se_type = se_type
@@ -83,9 +132,14 @@ class Variable(SymbolicExpression):
 
 
 class Conditional(SymbolicExpression):
-    def __init__(self, se_type, options):
+    __slots__ = ("se_type", "options")
+
+    def __new__(cls, se_type, options):
+        return cls._intern((se_type, tuple(options)))
+
+    def _initialize(self, se_type, options):
         self.se_type = se_type
-        self.options = tuple(options)
+        self.options = options
 
     def equality_components(self):
         return self.se_type, self.options
@@ -98,7 +152,12 @@ class Conditional(SymbolicExpression):
 
 
 class Literal(SymbolicExpression):
-    def __init__(self, value, se_type, implicit = False):
+    """ Literal value. Whether it is implicit (e.g. a default initializer) does not take part in equality, so equal
+    literals are the same object, which keeps the flag it was first constructed with.
+    """
+    __slots__ = ("value", "se_type", "implicit")
+
+    def __new__(cls, value, se_type, implicit=False):
         ctors_map = {
             SEType.CHAR: str,
             SEType.FLOAT: float,
@@ -111,7 +170,10 @@ class Literal(SymbolicExpression):
         if ctor is None:
             raise MantarayNotImplemented(se_type)
 
-        self.value = ctor(value)
+        return cls._intern((ctor(value), se_type), (implicit,))
+
+    def _initialize(self, value, se_type, implicit):
+        self.value = value
         self.se_type = se_type
         self.implicit = implicit
 
@@ -159,22 +221,25 @@ class BinaryOperatorType(Enum):
 
     @staticmethod
     def get_from_sign(bop_sign):
-        bop_type_list = [member for member in BinaryOperatorType.__members__.values() if member.value == bop_sign]
-
-        if not bop_type_list:
+        try:
+            return BinaryOperatorType(bop_sign)
+        except ValueError:
             raise MantarayError("Unknown binary operator type: {0}".format(bop_sign))
 
-        return bop_type_list[0]
-
 
 class BinaryOperator(SymbolicExpression):
-    def __init__(self, argument1, argument2, bop_type):
+    __slots__ = ("argument1", "argument2", "bop_type")
+
+    def __new__(cls, argument1, argument2, bop_type):
+        return cls._intern((argument1, argument2, bop_type))
+
+    def _initialize(self, argument1, argument2, bop_type):
         self.argument1 = argument1
         self.argument2 = argument2
         self.bop_type = bop_type
 
     def equality_components(self):
-        return self.argument1, self.argument2
+        return self.argument1, self.argument2, self.bop_type
 
     def get_se_type(self):
         se_type1 = self.argument1.get_se_type()
@@ -187,9 +252,15 @@ class BinaryOperator(SymbolicExpression):
 
     @staticmethod
     def create_from_args(bop_type, *args):
-        if len(args) == 1 and isinstance(args[0], collections.Iterable):
+        if len(args) == 1 and isinstance(args[0], collections.abc.Iterable):
             args = args[0]
 
+        if bop_type is BinaryOperatorType.AND:
+            return se_and(*args)
+
+        if bop_type is BinaryOperatorType.OR:
+            return se_or(*args)
+
         bop = None
 
         for argument in args:
@@ -201,6 +272,42 @@ class BinaryOperator(SymbolicExpression):
         return "({0} {1} {2})".format(self.argument1, str(self.bop_type), self.argument2)
 
 
+class Junction(SymbolicExpression, ABC):
+    """ Abstract base for n-ary boolean connectives. Arguments are kept flat, without duplicates, in order of their
+    first occurrence.
+    """
+    __slots__ = ("arguments",)
+
+    bop_type = None
+
+    def __new__(cls, arguments):
+        return cls._intern((tuple(arguments),))
+
+    def _initialize(self, arguments):
+        self.arguments = arguments
+
+    def equality_components(self):
+        return self.arguments,
+
+    def get_se_type(self):
+        return SEType.BOOL
+
+    def __str__(self):
+        return "({0})".format(" {0} ".format(self.bop_type).join(map(str, self.arguments)))
+
+
+class And(Junction):
+    __slots__ = ()
+
+    bop_type = BinaryOperatorType.AND
+
+
+class Or(Junction):
+    __slots__ = ()
+
+    bop_type = BinaryOperatorType.OR
+
+
 class UnaryOperatorType(Enum):
     NOT = "!"
 
@@ -209,21 +316,24 @@ class UnaryOperatorType(Enum):
 
     @staticmethod
     def get_from_sign(op_sign):
-        op_type_list = [member for member in UnaryOperatorType.__members__.values() if member.value == op_sign]
-
-        if not op_type_list:
+        try:
+            return UnaryOperatorType(op_sign)
+        except ValueError:
             raise MantarayError("Unknown unary operator type: {0}".format(op_sign))
 
-        return op_type_list[0]
-
 
 class UnaryOperator(SymbolicExpression):
-    def __init__(self, argument, op_type):
+    __slots__ = ("argument", "op_type")
+
+    def __new__(cls, argument, op_type):
+        return cls._intern((argument, op_type))
+
+    def _initialize(self, argument, op_type):
         self.argument = argument
         self.op_type = op_type
 
     def equality_components(self):
-        return self.argument
+        return self.argument, self.op_type
 
     def get_se_type(self):
         return self.argument.get_se_type()
@@ -236,13 +346,279 @@ SE_TRUE = Literal(True, SEType.BOOL)
 SE_FALSE = Literal(False, SEType.BOOL)
 
 
-def se_and(argument1, argument2):
-    return BinaryOperator(argument1, argument2, BinaryOperatorType.AND)
+def se_and(*arguments):
+    """ Returns conjunction of the arguments simplified at construction time
+    """
+    return _make_junction(arguments, And, Or, False)
 
 
-def se_or(argument1, argument2):
-    return BinaryOperator(argument1, argument2, BinaryOperatorType.OR)
+def se_or(*arguments):
+    """ Returns disjunction of the arguments simplified at construction time
+    """
+    return _make_junction(arguments, Or, And, True)
 
 
 def se_not(argument):
+    """ Returns negation of the argument with literals folded and double negation removed
+    """
+    if _is_bool_literal(argument):
+        return Literal(not argument.value, SEType.BOOL)
+
+    if _is_negation(argument):
+        return argument.argument
+
     return UnaryOperator(argument, UnaryOperatorType.NOT)
+
+
+def se_conditional(se_type, options):
+    """ Returns conditional of the options without ones which never hold. Conditional, which first option always
+    holds, is replaced with its value.
+    """
+    feasible_options = [option for option in options if not _is_bool_literal(option.condition, False)]
+
+    if not feasible_options:
+        return Conditional(se_type, options)
+
+    if _is_bool_literal(feasible_options[0].condition, True):
+        return feasible_options[0].value
+
+    return Conditional(se_type, feasible_options)
+
+
+def se_binary(argument1, argument2, bop_type):
+    """ Returns binary operator applied to the arguments, with literals folded and identities applied
+    """
+    if bop_type is BinaryOperatorType.AND:
+        return se_and(argument1, argument2)
+
+    if bop_type is BinaryOperatorType.OR:
+        return se_or(argument1, argument2)
+
+    if isinstance(argument1, Literal) and isinstance(argument2, Literal):
+        folded = _fold(argument1, argument2, bop_type)
+
+        if folded is not None:
+            return folded
+
+    if argument1 is argument2 and bop_type in _reflexive_comparisons:
+        return Literal(_reflexive_comparisons[bop_type], SEType.BOOL)
+
+    if bop_type is BinaryOperatorType.ADD:
+        if _is_int_literal(argument1, 0):
+            return argument2
+        if _is_int_literal(argument2, 0):
+            return argument1
+    elif bop_type is BinaryOperatorType.MINUS:
+        if _is_int_literal(argument2, 0):
+            return argument1
+    elif bop_type is BinaryOperatorType.MUL:
+        if _is_int_literal(argument1, 1):
+            return argument2
+        if _is_int_literal(argument2, 1):
+            return argument1
+    elif bop_type is BinaryOperatorType.DIV:
+        if _is_int_literal(argument2, 1):
+            return argument1
+
+    return BinaryOperator(argument1, argument2, bop_type)
+
+
+def se_unary(argument, op_type):
+    """ Returns unary operator applied to the argument, simplified at construction time
+    """
+    if op_type is UnaryOperatorType.NOT:
+        return se_not(argument)
+
+    return UnaryOperator(argument, op_type)
+
+
+_reflexive_comparisons = {
+    BinaryOperatorType.EQ: True,
+    BinaryOperatorType.GE: True,
+    BinaryOperatorType.LE: True,
+    BinaryOperatorType.NE: False,
+    BinaryOperatorType.GT: False,
+    BinaryOperatorType.LT: False,
+}
+
+_comparisons = {
+    BinaryOperatorType.EQ: lambda value1, value2: value1 == value2,
+    BinaryOperatorType.NE: lambda value1, value2: value1 != value2,
+    BinaryOperatorType.GT: lambda value1, value2: value1 > value2,
+    BinaryOperatorType.GE: lambda value1, value2: value1 >= value2,
+    BinaryOperatorType.LT: lambda value1, value2: value1 < value2,
+    BinaryOperatorType.LE: lambda value1, value2: value1 <= value2,
+}
+
+_integer_operations = {
+    BinaryOperatorType.ADD: lambda value1, value2: value1 + value2,
+    BinaryOperatorType.MINUS: lambda value1, value2: value1 - value2,
+    BinaryOperatorType.MUL: lambda value1, value2: value1 * value2,
+}
+
+
+def _fold(literal1, literal2, bop_type):
+    """ Evaluates operator on literals the same way the solver does, returns None if it can not be folded in Python
+    """
+    numeric_types = (SEType.INT, SEType.FLOAT)
+
+    if bop_type in _comparisons:
+        if literal1.se_type is literal2.se_type or literal1.se_type in numeric_types and \
+                literal2.se_type in numeric_types:
+            return Literal(_comparisons[bop_type](literal1.value, literal2.value), SEType.BOOL)
+        return None
+
+    # Real arithmetic is exact in the solver, so only integer one is folded
+    if literal1.se_type is not SEType.INT or literal2.se_type is not SEType.INT:
+        return None
+
+    if bop_type in _integer_operations:
+        return Literal(_integer_operations[bop_type](literal1.value, literal2.value), SEType.INT)
+
+    if bop_type is BinaryOperatorType.DIV and literal2.value != 0:
+        # Integer division of the solver rounds so that the remainder is non-negative
+        quotient = literal1.value // abs(literal2.value)
+        return Literal(quotient if literal2.value > 0 else -quotient, SEType.INT)
+
+    return None
+
+
+def _make_junction(arguments, junction_class, dual_junction_class, absorbing_value):
+    # Dictionary keeps arguments unique in order of their first occurrence
+    flat_arguments = {}
+
+    for argument in arguments:
+        for flat_argument in argument.arguments if isinstance(argument, junction_class) else (argument,):
+            if _is_bool_literal(flat_argument):
+                if flat_argument.value is absorbing_value:
+                    return flat_argument
+                continue
+
+            flat_arguments[flat_argument] = None
+
+    # Arguments hold within negated junctions of the same kind, e.g. `a && !(a && b)` is `a && !b`, and their
+    # complements make such junctions neutral, e.g. `a && !(!a && b)` is `a`
+    reduced_arguments = {}
+
+    for argument in flat_arguments:
+        if _is_negation(argument) and isinstance(argument.argument, junction_class):
+            negated_arguments = argument.argument.arguments
+
+            if any(se_not(negated_argument) in flat_arguments for negated_argument in negated_arguments):
+                continue
+
+            remaining_arguments = [negated_argument for negated_argument in negated_arguments
+                                   if negated_argument not in flat_arguments]
+
+            if not remaining_arguments:
+                return Literal(absorbing_value, SEType.BOOL)
+
+            if len(remaining_arguments) < len(negated_arguments):
+                argument = se_not(_make_junction(remaining_arguments, junction_class, dual_junction_class,
+                                                 absorbing_value))
+
+                if _is_bool_literal(argument):
+                    if argument.value is absorbing_value:
+                        return argument
+                    continue
+
+        reduced_arguments[argument] = None
+
+    flat_arguments = reduced_arguments
+
+    for argument in flat_arguments:
+        if _is_negation(argument) and argument.argument in flat_arguments:
+            return Literal(absorbing_value, SEType.BOOL)
+
+    # Absorption, e.g. `a && (a || b)` is `a`
+    flat_arguments = [argument for argument in flat_arguments if not isinstance(argument, dual_junction_class) or
+                      not any(dual_argument in flat_arguments for dual_argument in argument.arguments)]
+
+    if not flat_arguments:
+        return Literal(not absorbing_value, SEType.BOOL)
+
+    if len(flat_arguments) == 1:
+        return flat_arguments[0]
+
+    return junction_class(flat_arguments)
+
+
+def _is_bool_literal(s_expression, value=None):
+    return isinstance(s_expression, Literal) and s_expression.se_type is SEType.BOOL and \
+        (value is None or s_expression.value is value)
+
+
+def _is_int_literal(s_expression, value):
+    return isinstance(s_expression, Literal) and s_expression.se_type is SEType.INT and s_expression.value == value
+
+
+def _is_negation(s_expression, argument=None):
+    return isinstance(s_expression, UnaryOperator) and s_expression.op_type is UnaryOperatorType.NOT and \
+        (argument is None or s_expression.argument is argument)
+
+
+def get_conjuncts(s_expression):
+    """ Returns arguments of the conjunction, or the expression itself if it is not a conjunction
+    """
+    if isinstance(s_expression, And):
+        return s_expression.arguments
+
+    return s_expression,
+
+
+def merge_options(options):
+    """ Merges options with equal values into single options with disjoined conditions. Options with false
+    conditions are dropped, as well as conditions subsumed by other conditions of the same value, i.e. having all
+    their conjuncts, e.g. `a && b` is subsumed by `a`.
+    """
+    # Dictionaries keep values and their conditions unique in order of their first occurrence
+    conditions = {}
+
+    for option in options:
+        if option.condition is SE_FALSE:
+            continue
+
+        value_conditions = conditions.setdefault(option.value, {})
+
+        for condition in option.condition.arguments if isinstance(option.condition, Or) else (option.condition,):
+            value_conditions[condition] = None
+
+    return [Option(se_or(*_drop_subsumed(list(value_conditions))), value)
+            for value, value_conditions in conditions.items()]
+
+
+def _drop_subsumed(conditions):
+    if len(conditions) < 2:
+        return conditions
+
+    conjuncts_sets = [frozenset(get_conjuncts(condition)) for condition in conditions]
+    kept_indices = []
+
+    # Subsuming conditions have fewer conjuncts, so they are kept before the conditions they subsume
+    for index in sorted(range(len(conjuncts_sets)), key=lambda index: len(conjuncts_sets[index])):
+        if not any(conjuncts_sets[kept_index] <= conjuncts_sets[index] for kept_index in kept_indices):
+            kept_indices.append(index)
+
+    return [conditions[index] for index in sorted(kept_indices)]
+
+
+def get_children(s_expression):
+    """ Returns direct subexpressions of the given expression
+    """
+    if isinstance(s_expression, BinaryOperator):
+        return s_expression.argument1, s_expression.argument2
+
+    if isinstance(s_expression, UnaryOperator):
+        return s_expression.argument,
+
+    if isinstance(s_expression, Junction):
+        return s_expression.arguments
+
+    if isinstance(s_expression, Conditional):
+        children = []
+        for option in s_expression.options:
+            children.append(option.condition)
+            children.append(option.value)
+        return children
+
+    return ()
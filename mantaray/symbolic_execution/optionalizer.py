@@ -1,5 +1,9 @@
-from mantaray.solving.solver import se_simplify, is_sat
-from mantaray.symbolic_execution.expressions import Option, SE_TRUE, se_and, BinaryOperator, UnaryOperator
+import itertools
+
+from mantaray.solving.solver import se_simplify_all, check_all
+from mantaray.symbolic_execution.domains import IntervalDomain
+from mantaray.symbolic_execution.expressions import Option, SE_TRUE, se_and, se_or, se_binary, se_unary, \
+    merge_options
 from mantaray.symbolic_execution.visitor import SEVisitor
 
 
@@ -16,7 +20,7 @@ class Optionalizer(SEVisitor):
         for argument1_option in self.optionalize(binary_operator.argument1):
             for argument2_option in self.optionalize(binary_operator.argument2):
                 condition = se_and(argument1_option.condition, argument2_option.condition)
-                value = BinaryOperator(argument1_option.value, argument2_option.value, binary_operator.bop_type)
+                value = se_binary(argument1_option.value, argument2_option.value, binary_operator.bop_type)
                 yield Option(condition, value)
 
     def visit_Variable(self, variable):
@@ -24,21 +28,52 @@ class Optionalizer(SEVisitor):
 
     def visit_Conditional(self, conditional):
         for option in conditional.options:
-            value_options = self.optionalize(option.value)
-            for value_option in value_options:
-                yield Option(se_and(option.condition, value_option.condition), value_option.value)
+            # Conditions of options may depend on conditionals as well
+            for condition_option in self.optionalize(option.condition):
+                condition = se_and(condition_option.condition, condition_option.value)
+                for value_option in self.optionalize(option.value):
+                    yield Option(se_and(condition, value_option.condition), value_option.value)
 
     def visit_UnaryOperator(self, unary_operator):
         for argument_option in self.optionalize(unary_operator.argument):
-            value = UnaryOperator(argument_option.value, unary_operator.op_type)
+            value = se_unary(argument_option.value, unary_operator.op_type)
             yield Option(argument_option.condition, value)
 
+    def visit_And(self, conjunction):
+        return self._optionalize_junction(conjunction, se_and)
+
+    def visit_Or(self, disjunction):
+        return self._optionalize_junction(disjunction, se_or)
+
+    def _optionalize_junction(self, junction, make_junction):
+        arguments_options = [list(self.optionalize(argument)) for argument in junction.arguments]
+
+        for options in itertools.product(*arguments_options):
+            condition = se_and(*[option.condition for option in options])
+            value = make_junction(*[option.value for option in options])
+            yield Option(condition, value)
+
 optionalizer = Optionalizer()
 
 
-def optionalize(s_expression):
-    for option in optionalizer.optionalize(s_expression):
-        simplified_condition = se_simplify(option.condition)
-        simplified_value = se_simplify(option.value)
-        if (is_sat(simplified_condition)):
-            yield Option(simplified_condition, simplified_value)
+def optionalize(s_expression, domain=None):
+    """ Yields feasible options of the expression. Options with equal values are merged before solving, and once
+    more after simplification. Conditions decided by the abstract domain are not passed to the solver, the rest are
+    simplified and checked in batches, so a single solver serves all options of the expression.
+    """
+    domain = domain if domain is not None else IntervalDomain()
+    top = domain.top()
+    options = [option for option in merge_options(optionalizer.optionalize(s_expression))
+               if domain.decide(top, option.condition) is not False]
+    conditions = se_simplify_all([option.condition for option in options])
+
+    # Undecided conditions are left as None to be solved at once
+    feasibility = [domain.is_feasible(top, condition, lambda: None) for condition in conditions]
+    results = iter(check_all([condition for condition, feasible in zip(conditions, feasibility) if feasible is None]))
+    feasibility = [next(results).maybe_sat if feasible is None else feasible for feasible in feasibility]
+
+    feasible_options = [(condition, option.value)
+                        for option, condition, feasible in zip(options, conditions, feasibility) if feasible]
+    values = se_simplify_all([value for _, value in feasible_options])
+
+    yield from merge_options(Option(condition, value) for (condition, _), value in zip(feasible_options, values))
@@ -39,13 +39,11 @@ class SEType(Enum):
 
     @staticmethod
     def get_from_name(type_name):
-        se_type_list = [member for member in SEType.__members__.values() if member.value == type_name]
-
-        if not se_type_list:
+        try:
+            return SEType(type_name)
+        except ValueError:
             raise MantarayError("Unknown type: `{0}`".format(type_name))
 
-        return se_type_list[0]
-
     @staticmethod
     def get_from_ast(node):
         return SEType.get_from_name(get_ast_type(node))
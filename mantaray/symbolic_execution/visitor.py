@@ -1,11 +1,13 @@
 from abc import ABC
 
 from mantaray.errors import MantarayNotImplemented
-from mantaray.symbolic_execution.expressions import BinaryOperator, Conditional, Option, UnaryOperator
+from mantaray.symbolic_execution.expressions import Option, Variable, Literal, Conditional, BinaryOperator, \
+    UnaryOperator, And, Or, se_binary, se_unary, se_and, se_or, se_conditional
 
 
 class SEVisitor(ABC):
-    """ An abstract base class for visiting symbolic expression nodes.
+    """ An abstract base class for visiting symbolic expression nodes. Leaves are visited as is by default, visitors
+    of other nodes are defined by subclasses.
     """
 
     def visit(self, node):
@@ -16,26 +18,96 @@ class SEVisitor(ABC):
     def visit_Variable(self, variable):
         return variable
 
-    def visit_Conditional(self, conditional):
-        visited_options = []
+    def visit_Literal(self, literal):
+        return literal
 
-        for option in conditional.options:
-            visited_option = Option(option.condition, self.visit(option.value))
-            visited_options.append(visited_option)
+    def __generic_visit(self, node):
+        raise MantarayNotImplemented(type(node).__name__)
 
-        return Conditional(conditional.se_type, visited_options)
 
-    def visit_Literal(self, literal):
-        return literal
+class SETransformer(SEVisitor):
+    """ Base class for rewriting expressions by replacing their leaves. Expressions are traversed iteratively in
+    post-order, every shared subexpression is transformed once, and nodes whose children are unchanged are returned
+    as is, so untouched parts of expressions are shared instead of being rebuilt.
+    """
+    # Conditions of conditionals are transformed too, otherwise only their values are
+    transform_conditions = False
 
-    def visit_BinaryOperator(self, binary_operator):
-        argument1 = self.visit(binary_operator.argument1)
-        argument2 = self.visit(binary_operator.argument2)
-        return BinaryOperator(argument1, argument2, binary_operator.bop_type)
+    def transform(self, s_expression):
+        transformed = {}
+        stack = [(s_expression, False)]
 
-    def visit_UnaryOperator(self, unary_operator):
-        argument = self.visit(unary_operator.argument)
-        return UnaryOperator(argument, unary_operator.op_type)
+        while stack:
+            node, children_transformed = stack.pop()
+
+            if node in transformed:
+                continue
+
+            if not children_transformed:
+                children = self._get_children(node)
+
+                if children:
+                    stack.append((node, True))
+                    stack.extend((child, False) for child in children if child not in transformed)
+                    continue
+
+            transformed[node] = self._rebuild(node, transformed)
+
+        return transformed[s_expression]
+
+    def _get_children(self, node):
+        if isinstance(node, BinaryOperator):
+            return node.argument1, node.argument2
+
+        if isinstance(node, UnaryOperator):
+            return node.argument,
+
+        if isinstance(node, (And, Or)):
+            return node.arguments
+
+        if isinstance(node, Conditional):
+            if self.transform_conditions:
+                return [child for option in node.options for child in (option.condition, option.value)]
+
+            return [option.value for option in node.options]
+
+        return ()
+
+    def _rebuild(self, node, transformed):
+        if isinstance(node, Variable):
+            return self.visit_Variable(node)
+
+        if isinstance(node, Literal):
+            return self.visit_Literal(node)
+
+        if isinstance(node, BinaryOperator):
+            argument1 = transformed[node.argument1]
+            argument2 = transformed[node.argument2]
+
+            if argument1 is node.argument1 and argument2 is node.argument2:
+                return node
+
+            return se_binary(argument1, argument2, node.bop_type)
+
+        if isinstance(node, UnaryOperator):
+            argument = transformed[node.argument]
+            return node if argument is node.argument else se_unary(argument, node.op_type)
+
+        if isinstance(node, (And, Or)):
+            arguments = [transformed[argument] for argument in node.arguments]
+
+            if all(argument is original for argument, original in zip(arguments, node.arguments)):
+                return node
+
+            return se_and(*arguments) if isinstance(node, And) else se_or(*arguments)
+
+        if isinstance(node, Conditional):
+            options = [Option(transformed[option.condition] if self.transform_conditions else option.condition,
+                              transformed[option.value]) for option in node.options]
+
+            if all(option == original for option, original in zip(options, node.options)):
+                return node
+
+            return se_conditional(node.se_type, options)
 
-    def __generic_visit(self, node):
         raise MantarayNotImplemented(type(node).__name__)
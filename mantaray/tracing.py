@@ -0,0 +1,111 @@
+import json
+import logging
+import time
+from enum import IntEnum
+
+
+class TraceLevel(IntEnum):
+    """ Enum class to represent severity of trace events
+    """
+
+    DEBUG = logging.DEBUG
+    INFO = logging.INFO
+    WARNING = logging.WARNING
+    ERROR = logging.ERROR
+
+    def __str__(self):
+        return self.name
+
+
+class TraceEvent:
+    """ Structured trace event. Its message is a format string rendered from fields only when a sink needs text.
+    """
+    __slots__ = ("time", "level", "source", "name", "message", "fields")
+
+    def __init__(self, level, source, name, message, fields):
+        self.time = time.time()
+        self.level = level
+        self.source = source
+        self.name = name
+        self.message = message
+        self.fields = fields
+
+    def render(self):
+        return self.message.format(**self.fields)
+
+
+class LoggingSink:
+    """ Renders trace events as messages of standard loggers named by events sources
+    """
+    def write(self, event):
+        logger = logging.getLogger(event.source)
+
+        if logger.isEnabledFor(event.level):
+            logger.log(event.level, event.render())
+
+    def close(self):
+        pass
+
+
+class JSONLinesSink:
+    """ Writes trace events into the file, one JSON object per line
+    """
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, event):
+        record = {
+            "time": event.time,
+            "level": str(event.level),
+            "source": event.source,
+            "event": event.name,
+            "message": event.render(),
+        }
+
+        for name, value in event.fields.items():
+            record[name] = value if isinstance(value, (bool, int, float, type(None))) else str(value)
+
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class Tracer:
+    """ Dispatches trace events to sinks. Call sites check `is_enabled` before building an event, so tracing costs a
+    single comparison when no sink is interested in the level.
+    """
+    DISABLED = TraceLevel.ERROR + 1
+
+    def __init__(self):
+        self.level = Tracer.DISABLED
+        self._sinks = []
+
+    def is_enabled(self, level):
+        return level >= self.level
+
+    def add_sink(self, sink, level=TraceLevel.DEBUG):
+        self._sinks.append((sink, level))
+        self.level = min(self.level, level)
+
+    def remove_sink(self, sink):
+        self._sinks = [(other_sink, level) for other_sink, level in self._sinks if other_sink is not sink]
+        self.level = min([level for _, level in self._sinks], default=Tracer.DISABLED)
+
+    def clear(self):
+        for sink, _ in self._sinks:
+            sink.close()
+
+        self._sinks = []
+        self.level = Tracer.DISABLED
+
+    def emit(self, level, source, event, message, **fields):
+        trace_event = TraceEvent(level, source, event, message, fields)
+
+        for sink, sink_level in self._sinks:
+            if level >= sink_level:
+                sink.write(trace_event)
+
+
+tracer = Tracer()
@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from random import choice
 from string import ascii_lowercase
 
@@ -6,3 +7,193 @@ def get_random_id(prefix="", length=10):
     """ Generates random identifier name with given prefix and length
     """
     return prefix + ''.join(choice(ascii_lowercase) for _ in range(length))
+
+
+class LRUCache:
+    """ Mapping bounded by the least recently used eviction policy
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            value = self._items[key]
+        except KeyError:
+            return default
+
+        self._items.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def clear(self):
+        self._items.clear()
+
+
+class _TrieNode:
+    __slots__ = ("bitmap", "entries")
+
+    def __init__(self, bitmap, entries):
+        self.bitmap = bitmap
+        self.entries = entries
+
+
+class _CollisionNode:
+    __slots__ = ("key_hash", "entries")
+
+    def __init__(self, key_hash, entries):
+        self.key_hash = key_hash
+        self.entries = entries
+
+
+class PersistentMap:
+    """ Immutable mapping implemented as a hash array mapped trie. Updates return a new map sharing all untouched
+    nodes with the original one, so both copying and updating cost O(log n).
+    """
+    __slots__ = ("_root", "_size")
+
+    _BITS = 5
+    _MASK = (1 << _BITS) - 1
+    _HASH_MASK = (1 << 64) - 1
+
+    def __init__(self, root=None, size=0):
+        self._root = _TrieNode(0, ()) if root is None else root
+        self._size = size
+
+    def get(self, key, default=None):
+        key_hash = hash(key) & PersistentMap._HASH_MASK
+        node = self._root
+        shift = 0
+
+        while True:
+            if isinstance(node, _TrieNode):
+                bit = 1 << ((key_hash >> shift) & PersistentMap._MASK)
+
+                if not node.bitmap & bit:
+                    return default
+
+                node = node.entries[bin(node.bitmap & (bit - 1)).count("1")]
+                shift += PersistentMap._BITS
+            elif isinstance(node, _CollisionNode):
+                for entry_key, entry_value in node.entries:
+                    if entry_key == key:
+                        return entry_value
+                return default
+            else:
+                return node[1] if node[0] == key else default
+
+    def set(self, key, value):
+        """ Returns a new map, where the key is associated with the value
+        """
+        root, added = PersistentMap._set(self._root, 0, hash(key) & PersistentMap._HASH_MASK, key, value)
+
+        if root is self._root:
+            return self
+
+        return PersistentMap(root, self._size + 1 if added else self._size)
+
+    def items(self):
+        stack = [self._root]
+
+        while stack:
+            node = stack.pop()
+
+            if isinstance(node, _TrieNode):
+                stack.extend(reversed(node.entries))
+            elif isinstance(node, _CollisionNode):
+                yield from node.entries
+            else:
+                yield node
+
+    def keys(self):
+        return (key for key, value in self.items())
+
+    def values(self):
+        return (value for key, value in self.items())
+
+    def __getitem__(self, key):
+        value = self.get(key, _TrieNode)
+
+        if value is _TrieNode:
+            raise KeyError(key)
+
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _TrieNode) is not _TrieNode
+
+    def __iter__(self):
+        return self.keys()
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _set(node, shift, key_hash, key, value):
+        if isinstance(node, _CollisionNode):
+            entries = [entry for entry in node.entries if entry[0] != key]
+            added = len(entries) == len(node.entries)
+            return _CollisionNode(key_hash, tuple(entries) + ((key, value),)), added
+
+        bit = 1 << ((key_hash >> shift) & PersistentMap._MASK)
+        index = bin(node.bitmap & (bit - 1)).count("1")
+
+        if not node.bitmap & bit:
+            entries = node.entries[:index] + ((key, value),) + node.entries[index:]
+            return _TrieNode(node.bitmap | bit, entries), True
+
+        entry = node.entries[index]
+
+        if isinstance(entry, (_TrieNode, _CollisionNode)):
+            if isinstance(entry, _CollisionNode) and entry.key_hash != key_hash:
+                child = PersistentMap._split(shift + PersistentMap._BITS, entry, entry.key_hash, (key, value),
+                                             key_hash)
+                added = True
+            else:
+                child, added = PersistentMap._set(entry, shift + PersistentMap._BITS, key_hash, key, value)
+
+                if child is entry:
+                    return node, False
+        elif entry[0] == key:
+            if entry[1] is value:
+                return node, False
+
+            child = (key, value)
+            added = False
+        else:
+            entry_hash = hash(entry[0]) & PersistentMap._HASH_MASK
+
+            if entry_hash == key_hash:
+                child = _CollisionNode(key_hash, (entry, (key, value)))
+            else:
+                child = PersistentMap._split(shift + PersistentMap._BITS, entry, entry_hash, (key, value), key_hash)
+
+            added = True
+
+        return _TrieNode(node.bitmap, node.entries[:index] + (child,) + node.entries[index + 1:]), added
+
+    @staticmethod
+    def _split(shift, entry1, hash1, entry2, hash2):
+        """ Builds a subtrie holding two entries with different hashes
+        """
+        index1 = (hash1 >> shift) & PersistentMap._MASK
+        index2 = (hash2 >> shift) & PersistentMap._MASK
+
+        if index1 == index2:
+            child = PersistentMap._split(shift + PersistentMap._BITS, entry1, hash1, entry2, hash2)
+            return _TrieNode(1 << index1, (child,))
+
+        entries = (entry1, entry2) if index1 < index2 else (entry2, entry1)
+        return _TrieNode((1 << index1) | (1 << index2), entries)
@@ -0,0 +1,30 @@
+import pytest
+
+from mantaray.core import analyze
+from mantaray.solving.counterexamples import evaluate
+from mantaray.solving.independence import get_atoms
+from mantaray.symbolic_execution.expressions import Variable
+
+
+@pytest.fixture
+def returned(tmp_path):
+    """ Returns a function, which analyzes the source and evaluates the value returned by the function for concrete
+    arguments given by parameters names. Exactly one returned option must hold for the arguments.
+    """
+    def returned(source, function="main", deepness=1, **arguments):
+        path = tmp_path / "source.c"
+        path.write_text(source)
+        result = next(result for result in analyze(str(path), deepness) if result.function_name == function)
+        values = []
+
+        for option in result.options:
+            model = {atom: arguments[atom.name] for atom in get_atoms(option.condition) | get_atoms(option.value)
+                     if isinstance(atom, Variable) and atom.name in arguments}
+
+            if evaluate(option.condition, model) is True:
+                values.append(evaluate(option.value, model))
+
+        assert len(values) == 1, "options holding for {0}: {1}".format(arguments, values)
+        return values[0]
+
+    return returned
@@ -0,0 +1,57 @@
+from mantaray.solving.cache import CanonicalForm, ResultCache
+from mantaray.solving.facade import SolverResult
+from mantaray.symbolic_execution.expressions import Variable, Literal, Option, BinaryOperatorType, se_and, se_not, \
+    se_binary, se_conditional
+from mantaray.symbolic_execution.type import SEType
+
+
+def get_query(context_id, returned_name):
+    p = Variable(context_id, "p", SEType.INT)
+    returned = Variable(context_id, returned_name, SEType.INT)
+    condition = se_binary(p, Literal(3, SEType.INT), BinaryOperatorType.GT)
+    value = se_conditional(SEType.INT, [Option(condition, se_binary(p, p, BinaryOperatorType.MUL)),
+                                        Option(se_not(condition), Literal(1, SEType.INT))])
+    return se_and(condition, se_binary(returned, value, BinaryOperatorType.EQ))
+
+
+def test_canonical_form_does_not_depend_on_names_of_contexts_and_returned_variables():
+    form1 = CanonicalForm(get_query("context1", "__f_ret_abcdefghij"))
+    form2 = CanonicalForm(get_query("context2", "__f_ret_klmnopqrst"))
+
+    assert form1.text == form2.text
+    assert form1.text != CanonicalForm(get_query("context1", "p")).text
+
+
+def test_canonical_form_is_decoded_into_the_same_expression():
+    query = get_query("context", "__f_ret_abcdefghij")
+    form = CanonicalForm(query)
+
+    assert form.decode(form.text) is query
+    assert form.decode(CanonicalForm(get_query("other", "__f_ret_klmnopqrst")).text) is query
+    assert form.encode(Variable("other", "p", SEType.INT)) is None
+
+
+def test_alpha_equivalent_queries_share_cached_results(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.db"))
+    checks = []
+
+    def check(s_expression):
+        checks.append(s_expression)
+        return SolverResult.SAT
+
+    assert cache.check(get_query("context1", "__f_ret_abcdefghij"), check) is SolverResult.SAT
+    assert cache.check(get_query("context2", "__f_ret_klmnopqrst"), check) is SolverResult.SAT
+    assert len(checks) == 1
+    cache.close()
+
+
+def test_results_stored_twice_are_counted_once(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.db"), max_entries=2)
+    queries = [get_query("context{0}".format(index), "__f_ret_abcdefghij") for index in range(2)]
+    assert cache.check_all(queries, lambda s_expressions: [SolverResult.SAT] * len(s_expressions)) == \
+        [SolverResult.SAT, SolverResult.SAT]
+
+    statistics = cache.statistics()
+    assert statistics["entries"] == 1
+    assert statistics["evictions"] == 0
+    cache.close()
@@ -0,0 +1,58 @@
+from multiprocessing.pool import ThreadPool
+
+import pytest
+
+from mantaray import core
+from mantaray.core import analyze
+
+SOURCE = """
+int g(int q) { if (q > 2) { return q; } return 0 - q; }
+int h(int q) { return g(q) + g(q + 1); }
+int main1(int p) { return h(p); }
+int main2(int p) { return g(p) * 2; }
+int main3(int p) { return p + 1; }
+"""
+
+
+def test_parallel_analysis_gives_sequential_results(tmp_path):
+    path = tmp_path / "source.c"
+    path.write_text(SOURCE)
+
+    def get_results(jobs):
+        return {result.function_name: [str(option) for option in result.options]
+                for result in analyze(str(path), jobs=jobs)}
+
+    assert get_results(2) == get_results(1)
+
+
+def test_bounded_map_keeps_window_of_tasks_submitted():
+    drawn = []
+    tasks = (drawn.append(index) or index for index in range(10))
+
+    with ThreadPool(2) as pool:
+        results = core._imap_bounded(pool, lambda task: task * 2, tasks, 3)
+        first = next(results)
+        assert len(drawn) <= 4
+        assert sorted([first] + list(results)) == [index * 2 for index in range(10)]
+
+
+def test_bounded_map_raises_errors_of_tasks():
+    def work(task):
+        if task == 1:
+            raise ValueError(task)
+
+        return task
+
+    with ThreadPool(2) as pool:
+        with pytest.raises(ValueError):
+            list(core._imap_bounded(pool, work, iter(range(3)), 2))
+
+
+def test_domain_statistics_count_queries_of_options(tmp_path):
+    path = tmp_path / "source.c"
+    path.write_text("int main(int p) { int r = 0; if (p > 3) { r = 1; } return r; }")
+    result = next(analyze(str(path)))
+    queries = result.statistics["domain"]["queries"]
+
+    assert len(result.options) == 2
+    assert result.statistics["domain"]["queries"] == queries + 2
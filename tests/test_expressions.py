@@ -0,0 +1,40 @@
+import copy
+import pickle
+
+import pytest
+
+from mantaray.symbolic_execution.expressions import Variable, Literal, Option, BinaryOperator, UnaryOperator, \
+    Conditional, And, Or, BinaryOperatorType, UnaryOperatorType
+from mantaray.symbolic_execution.type import SEType
+
+
+def build_expressions():
+    """ Returns structurally equal expressions on every call, constructed without smart constructors
+    """
+    x = Variable("test", "x", SEType.INT)
+    y = Variable("test", "y", SEType.INT)
+    flag = Variable("test", "flag", SEType.BOOL)
+    comparison = BinaryOperator(x, Literal(3, SEType.INT), BinaryOperatorType.GT)
+    negation = UnaryOperator(flag, UnaryOperatorType.NOT)
+    conditional = Conditional(SEType.INT, [Option(comparison, y), Option(negation, Literal(1.5, SEType.FLOAT))])
+    return [x, Literal(True, SEType.BOOL), comparison, negation, conditional, And([comparison, negation]),
+            Or([comparison, BinaryOperator(conditional, y, BinaryOperatorType.EQ)])]
+
+
+@pytest.mark.parametrize("index", range(len(build_expressions())))
+def test_structurally_equal_expressions_are_identical(index):
+    expression = build_expressions()[index]
+
+    assert build_expressions()[index] is expression
+    assert copy.copy(expression) is expression
+    assert copy.deepcopy(expression) is expression
+    assert pickle.loads(pickle.dumps(expression)) is expression
+
+
+def test_implicit_literals_are_equal_to_explicit_ones():
+    literal = Literal(7, SEType.INT)
+
+    assert Literal(7, SEType.INT, implicit=True) is literal
+    assert not literal.implicit
+    assert Literal(987654321, SEType.INT, implicit=True).implicit
+    assert Literal(7, SEType.FLOAT) is not literal
@@ -0,0 +1,167 @@
+import pytest
+
+from mantaray.ast_interpretation import interpreter
+from mantaray.core import analyze
+from mantaray.errors import MantarayNotImplemented
+from mantaray.symbolic_execution.expressions import Variable, BinaryOperatorType, se_and, se_not, se_binary
+from mantaray.symbolic_execution.type import SEType
+from mantaray.tracing import tracer, TraceLevel
+
+
+class UnrolledLoopsSink:
+    def __init__(self):
+        self.iterations = []
+        self.truncated_iterations = []
+
+    def write(self, event):
+        if event.name == "loop_unrolled":
+            self.iterations.append(event.fields["iterations"])
+        elif event.name == "loop_truncated":
+            self.truncated_iterations.append(event.fields["iterations"])
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def unrolled_loops_sink():
+    sink = UnrolledLoopsSink()
+    tracer.add_sink(sink, TraceLevel.INFO)
+    yield sink
+    tracer.remove_sink(sink)
+
+
+@pytest.fixture
+def unrolled_loops(unrolled_loops_sink):
+    return unrolled_loops_sink.iterations
+
+
+@pytest.mark.parametrize("p", [-3, 0, 1, 2, 3, 4])
+def test_while_loop(returned, p):
+    source = """
+    int main(int p) {
+        int i = 0;
+        int s = 1;
+        while (i < p) {
+            s = s * 2 + i;
+            i = i + 1;
+        }
+        return s;
+    }
+    """
+    i, s = 0, 1
+    while i < p:
+        s, i = s * 2 + i, i + 1
+
+    assert returned(source, deepness=4, p=p) == s
+
+
+@pytest.mark.parametrize("p", [-3, 0, 1, 2, 3])
+def test_do_while_loop(returned, p):
+    source = """
+    int main(int p) {
+        int i = 0;
+        int s = 5;
+        do {
+            s -= i;
+            i++;
+        } while (i < p);
+        return s;
+    }
+    """
+    i, s = 0, 5
+    while True:
+        s, i = s - i, i + 1
+        if not i < p:
+            break
+
+    assert returned(source, deepness=3, p=p) == s
+
+
+@pytest.mark.parametrize("p", [-1, 0, 2, 3])
+def test_for_loop(returned, p):
+    source = """
+    int main(int p) {
+        int s = 0, t = 1;
+        for (int i = 0, j = 10; i < p; i++, j--) {
+            s += i * j;
+            t *= 2;
+            --t;
+        }
+        return s + t;
+    }
+    """
+    s, t = 0, 1
+    for i in range(max(p, 0)):
+        s += i * (10 - i)
+        t = t * 2 - 1
+
+    assert returned(source, deepness=3, p=p) == s + t
+
+
+def test_postfix_and_prefix_increments(returned):
+    source = """
+    int main(int p) {
+        int a = p;
+        int b = a++;
+        int c = ++a;
+        int d = a--;
+        return b * 1000 + c * 100 + d * 10 + a;
+    }
+    """
+    assert returned(source, p=3) == 3 * 1000 + 5 * 100 + 5 * 10 + 4
+
+
+def test_decided_iterations_are_not_bounded_by_deepness(returned):
+    source = "int main(int p) { int i; int s = 0; for (i = 0; i < 50; i++) { s += i; } return s + p; }"
+    assert returned(source, deepness=1, p=1) == sum(range(50)) + 1
+
+
+@pytest.mark.parametrize("deepness", [1, 3])
+def test_deepness_bounds_undecided_iterations(returned, deepness):
+    source = "int main(int p) { int i; int s = 0; for (i = 0; i < p; i++) { s += 2; } return s; }"
+
+    for p in range(deepness + 3):
+        # Paths of further iterations are cut off after the last unrolled one
+        assert returned(source, deepness=deepness, p=p) == 2 * min(p, deepness)
+
+
+def test_unrolling_stops_at_fixpoint(returned, unrolled_loops):
+    source = "int main(int p) { int x = 0; while (p > 0) { x = 7; } return x; }"
+
+    assert returned(source, deepness=100, p=0) == 0
+    assert returned(source, deepness=100, p=1) == 7
+    assert unrolled_loops == [2, 2]
+
+
+@pytest.mark.parametrize("count", [10, 15])
+def test_loops_exceeding_decided_iterations_limit_are_truncated(tmp_path, monkeypatch, unrolled_loops_sink, count):
+    monkeypatch.setattr(interpreter, "DECIDED_ITERATIONS_LIMIT", 10)
+    path = tmp_path / "source.c"
+    path.write_text("""
+    int g(int q) { int i; int s = q; for (i = 0; i < COUNT; i++) { s = s + 1; } return s; }
+    int main(int p) { return g(p) + g(p); }
+    """.replace("COUNT", str(count)))
+    results = {result.function_name: result for result in analyze(str(path))}
+    truncated = count > 10
+
+    assert results["g"].is_truncated is truncated
+    assert results["main"].is_truncated is truncated
+    assert results["main"].statistics["truncated_loops"] == (2 if truncated else 0)
+    assert unrolled_loops_sink.truncated_iterations == ([10] if truncated else [])
+
+
+@pytest.mark.parametrize("statement", ["break;", "continue;"])
+def test_jumps_in_loops_are_not_implemented(returned, statement):
+    source = "int main(int p) { int s = 0; while (s < 5) { if (s == p) { STATEMENT } s = s + 1; } return s; }"
+
+    with pytest.raises(MantarayNotImplemented):
+        returned(source.replace("STATEMENT", statement), p=2)
+
+
+def test_negated_conjunction_is_reduced():
+    a = se_binary(Variable("test", "a", SEType.INT), Variable("test", "c", SEType.INT), BinaryOperatorType.GT)
+    b = se_binary(Variable("test", "b", SEType.INT), Variable("test", "c", SEType.INT), BinaryOperatorType.LT)
+
+    assert se_and(a, se_not(se_and(a, b))) is se_and(a, se_not(b))
+    assert se_and(a, se_not(se_and(se_not(a), b))) is a
@@ -0,0 +1,34 @@
+import pytest
+
+from mantaray.solving.independence import get_atoms
+from mantaray.symbolic_execution.expressions import Variable, Literal, Option, Conditional, BinaryOperatorType, \
+    se_not, se_binary
+from mantaray.symbolic_execution.optionalizer import optionalizer
+from mantaray.symbolic_execution.type import SEType
+
+
+def test_conditions_depending_on_conditionals_are_optionalized():
+    p = Variable("test", "p", SEType.INT)
+    positive = se_binary(p, Literal(0, SEType.INT), BinaryOperatorType.GT)
+    x = Conditional(SEType.INT, [Option(positive, p), Option(se_not(positive), Literal(0, SEType.INT))])
+    large = se_binary(x, Literal(2, SEType.INT), BinaryOperatorType.GT)
+    r = Conditional(SEType.INT, [Option(large, Literal(1, SEType.INT)), Option(se_not(large), Literal(7, SEType.INT))])
+    options = list(optionalizer.optionalize(r))
+
+    assert len(options) == 4
+    assert not any(isinstance(atom, Conditional) for option in options for atom in get_atoms(option.condition))
+
+
+@pytest.mark.parametrize("p", [-1, 0, 2, 3, 5, 6, 9])
+def test_callee_entered_under_branch_of_caller(returned, p):
+    source = """
+    int g(int q) { int r = 0; if (q > 2) { r = 1; } return r; }
+    int main(int p) {
+        int x = 0;
+        if (p > 0) { x = p; }
+        int r = 7;
+        if (p > 5) { r = g(x); }
+        return r;
+    }
+    """
+    assert returned(source, p=p) == (7 if p <= 5 else 1)
@@ -0,0 +1,62 @@
+import pytest
+
+from mantaray.core import analyze
+from mantaray.profiling import profiler
+from mantaray.symbolic_execution.expressions import Variable, Literal, Option, BinaryOperatorType, SE_FALSE, se_and, \
+    se_or, se_binary, merge_options
+from mantaray.symbolic_execution.type import SEType
+
+
+def get_comparison(name, bound):
+    return se_binary(Variable("test", name, SEType.INT), Literal(bound, SEType.INT), BinaryOperatorType.GT)
+
+
+@pytest.fixture
+def solver_checks(tmp_path):
+    """ Returns a function, which analyzes the source and returns the number of satisfiability checks of single
+    expressions made meanwhile, i.e. ones made when conditional statements are joined
+    """
+    profiler.install()
+
+    def solver_checks(source):
+        path = tmp_path / "source.c"
+        path.write_text(source)
+        profiler.reset()
+        list(analyze(str(path)))
+        return profiler.report()["hooks"]["solver.check"]["count"]
+
+    yield solver_checks
+    profiler.uninstall()
+
+
+def test_options_with_equal_values_are_merged():
+    a, b, c = get_comparison("a", 0), get_comparison("b", 0), get_comparison("c", 0)
+    one, two = Literal(1, SEType.INT), Literal(2, SEType.INT)
+    options = [Option(a, one), Option(b, two), Option(SE_FALSE, two), Option(c, one)]
+
+    assert [(option.condition, option.value) for option in merge_options(options)] == [(se_or(a, c), one), (b, two)]
+
+
+def test_subsumed_conditions_are_dropped():
+    a, b, c = get_comparison("a", 0), get_comparison("b", 0), get_comparison("c", 0)
+    one, two = Literal(1, SEType.INT), Literal(2, SEType.INT)
+    options = [Option(se_and(a, b), one), Option(se_and(b, c), two), Option(se_or(se_and(b, a, c), a), one),
+               Option(se_and(c, b), two)]
+
+    assert [(option.condition, option.value) for option in merge_options(options)] == [(a, one),
+                                                                                       (se_and(b, c), two)]
+
+
+def test_options_of_entered_branches_are_not_checked(solver_checks):
+    source = "int main(int p, int q) { int r = 0; if (p * q > 3) { r = 1; } else { r = 2; } return r; }"
+    assert solver_checks(source) == 0
+
+
+def test_restricted_options_are_checked(solver_checks):
+    source = "int main(int p, int q) { int r = 0; if (p * q > 3) { r = 1; } return r; }"
+    assert solver_checks(source) == 1
+
+
+def test_options_passed_out_of_nested_statements_are_checked_once(solver_checks):
+    source = "int main(int p, int q) { int r = 0; if (p * q > 3) { if (p * q > 5) { r = 1; } } return r; }"
+    assert solver_checks(source) == 1
@@ -0,0 +1,81 @@
+import pytest
+
+
+def test_return_in_nested_block(returned):
+    assert returned("int main(int p) { { return 5; } return 7; }", p=0) == 5
+
+
+def test_assignment_after_return_in_nested_block(returned):
+    source = "int main(int p) { int t; { t = 3; return t; } t = p; return t; }"
+    assert returned(source, p=10) == 3
+
+
+@pytest.mark.parametrize("p", [-2, 0, 1, 4])
+def test_return_in_nested_block_of_branch(returned, p):
+    source = """
+    int main(int p) {
+        int r = 0;
+        if (p > 0) {
+            { r = 1; return r; }
+            r = 2;
+        } else {
+            r = 3;
+        }
+        return r;
+    }
+    """
+    assert returned(source, p=p) == (1 if p > 0 else 3)
+
+
+def test_return_in_loop_body(returned):
+    source = """
+    int main(int p) {
+        int i;
+        int s = 0;
+        for (i = 0; i < 5; i++) {
+            s = s + i;
+            if (i == 3) { return s; }
+        }
+        return 100;
+    }
+    """
+    assert returned(source, p=0) == 6
+
+
+@pytest.mark.parametrize("p", [-1, 0, 3, 9, 12])
+def test_return_in_loop_body_depending_on_parameter(returned, p):
+    source = """
+    int main(int p) {
+        int i = 0;
+        while (i < 10) {
+            if (i == p) { return i * 2; }
+            i++;
+        }
+        return 0 - 1;
+    }
+    """
+    assert returned(source, p=p) == (p * 2 if 0 <= p < 10 else -1)
+
+
+def test_return_in_nested_block_of_loop_body(returned):
+    source = """
+    int main(int p) {
+        int i = 0;
+        int b = 1;
+        while (i < 3) {
+            { return b + p; b = 5; }
+            b = 7;
+            i++;
+        }
+        return b;
+    }
+    """
+    assert returned(source, p=4) == 5
+
+
+def test_return_in_nested_block_of_callee(returned):
+    source = """
+    int g(int q) { { return q + 1; } return 2 * q; }
+    int main(int p) { return g(p) + g(p + 1); }
+    """
+    assert returned(source, p=3) == 9
@@ -0,0 +1,100 @@
+import sys
+import threading
+
+from mantaray.solving import solver
+from mantaray.solving.cache import ResultCache
+from mantaray.solving.counterexamples import CounterexampleCache
+from mantaray.solving.facade import SolverFacade, SolverResult, is_linear_integer
+from mantaray.symbolic_execution.expressions import Variable, Literal, BinaryOperatorType, se_and, se_binary
+from mantaray.symbolic_execution.type import SEType
+
+THREADS_COUNT = 8
+
+
+def get_bounds(index):
+    x = Variable("test", "x", SEType.INT)
+    y = Variable("test", "y", SEType.INT)
+    return se_and(se_binary(x, Literal(index, SEType.INT), BinaryOperatorType.GT),
+                  se_binary(y, Literal(index % 3, SEType.INT), BinaryOperatorType.EQ))
+
+
+def run_in_threads(work):
+    """ Runs the work in threads switched as often as possible, so races show up
+    """
+    errors = []
+
+    def run(thread_index):
+        try:
+            work(thread_index)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(THREADS_COUNT)]
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+
+    try:
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    return errors
+
+
+def test_counterexample_cache_is_shared_by_threads():
+    cache = CounterexampleCache()
+    facade = SolverFacade()
+
+    def work(thread_index):
+        for index in range(50):
+            assert cache.check(get_bounds(thread_index * 50 + index), facade.solve) is SolverResult.SAT
+
+    assert run_in_threads(work) == []
+    statistics = cache.statistics()
+    assert statistics["model_hits"] + statistics["misses"] == THREADS_COUNT * 50
+
+
+def test_group_results_and_result_cache_are_shared_by_threads(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path / "results.db"))
+    monkeypatch.setattr(solver, "group_results", solver.LRUCache(16))
+    monkeypatch.setattr(solver, "counterexample_cache", None)
+    solver.set_result_cache(cache)
+
+    def work(thread_index):
+        for index in range(50):
+            assert solver.check(get_bounds(index)) is SolverResult.SAT
+
+    try:
+        assert run_in_threads(work) == []
+    finally:
+        solver.set_result_cache(None)
+        cache.close()
+
+    statistics = cache.statistics()
+    assert statistics["hits"] + statistics["misses"] > 0
+
+
+def test_linear_integer_queries_are_solved_by_linear_logic():
+    x = Variable("test", "x", SEType.INT)
+    y = Variable("test", "y", SEType.INT)
+    f = Variable("test", "f", SEType.FLOAT)
+    linear = se_binary(se_binary(x, Literal(3, SEType.INT), BinaryOperatorType.MUL), y, BinaryOperatorType.GT)
+    nonlinear = se_binary(se_binary(x, y, BinaryOperatorType.MUL), Literal(3, SEType.INT), BinaryOperatorType.GT)
+    real = se_binary(f, Literal(0.5, SEType.FLOAT), BinaryOperatorType.GT)
+    facade = SolverFacade()
+
+    assert is_linear_integer(linear)
+    assert not is_linear_integer(nonlinear)
+    assert not is_linear_integer(real)
+    assert facade._get_logic(linear) == "QF_LIA"
+    assert facade._get_logic(linear, real) == "QF_NIRA"
+
+    for s_expression in (linear, nonlinear, real, se_and(linear, real)):
+        assert facade.check(s_expression) is SolverResult.SAT
+        assert facade.solve(s_expression)[0] is SolverResult.SAT
+
+    assert facade.check_all([linear, real]) == [SolverResult.SAT, SolverResult.SAT]
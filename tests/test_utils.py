@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+from mantaray.utils import PersistentMap
+
+
+class Key:
+    """ Key with the given hash, so keys of different names may collide
+    """
+    def __init__(self, name, key_hash):
+        self.name = name
+        self.key_hash = key_hash
+
+    def __hash__(self):
+        return self.key_hash
+
+    def __eq__(self, other):
+        return isinstance(other, Key) and self.name == other.name
+
+    def __repr__(self):
+        return "Key({0}, {1})".format(self.name, self.key_hash)
+
+
+def build(items):
+    persistent_map = PersistentMap()
+
+    for key, value in items:
+        persistent_map = persistent_map.set(key, value)
+
+    return persistent_map
+
+
+def test_set_and_get():
+    persistent_map = build((index, str(index)) for index in range(1000))
+
+    assert len(persistent_map) == 1000
+    assert all(persistent_map[index] == str(index) for index in range(1000))
+    assert persistent_map.get(1000) is None
+    assert persistent_map.get(1000, "default") == "default"
+    assert 999 in persistent_map and 1000 not in persistent_map
+
+    with pytest.raises(KeyError):
+        persistent_map[-1]
+
+
+def test_replaced_values():
+    persistent_map = build((index, index) for index in range(100))
+    updated_map = persistent_map.set(5, "five")
+
+    assert len(updated_map) == 100
+    assert updated_map[5] == "five"
+    assert updated_map.set(5, updated_map[5]) is updated_map
+
+
+@pytest.mark.parametrize("key_hashes", [
+    [7, 7, 7],
+    # Hashes sharing the lowest bits split into nested tries
+    [1, 1 + (1 << 5), 1 + (1 << 10), 1 + (1 << 10) + (1 << 40)],
+    # Colliding keys next to keys sharing their prefix of hash bits
+    [3, 3, 3 + (1 << 5), 3 + (1 << 5), 3 + (1 << 35)],
+    # Negative hashes are masked to unsigned ones
+    [-5, -5, 5, -5 + (1 << 5)],
+])
+def test_hash_collisions(key_hashes):
+    keys = [Key(index, key_hash) for index, key_hash in enumerate(key_hashes)]
+    persistent_map = build((key, key.name) for key in keys)
+
+    assert len(persistent_map) == len(keys)
+    assert all(persistent_map[key] == key.name for key in keys)
+    assert Key(len(keys), key_hashes[0]) not in persistent_map
+
+    for key in keys:
+        updated_map = persistent_map.set(key, "updated")
+        assert len(updated_map) == len(keys)
+        assert [updated_map[other_key] for other_key in keys] == \
+            ["updated" if other_key is key else other_key.name for other_key in keys]
+
+
+def test_iteration():
+    items = {Key(index, index % 37): index for index in range(300)}
+    persistent_map = build(items.items())
+
+    assert dict(persistent_map.items()) == items
+    assert set(persistent_map) == set(persistent_map.keys()) == set(items)
+    assert sorted(persistent_map.values()) == sorted(items.values())
+
+
+def test_older_versions_are_unchanged():
+    generator = random.Random(0)
+    versions = [(PersistentMap(), {})]
+
+    for _ in range(2000):
+        persistent_map, expected = versions[generator.randrange(len(versions))]
+        name = generator.randrange(200)
+        key = Key(name, name % 23)
+        value = generator.randrange(10)
+        versions.append((persistent_map.set(key, value), {**expected, key: value}))
+
+    for persistent_map, expected in versions:
+        assert len(persistent_map) == len(expected)
+        assert dict(persistent_map.items()) == expected